@@ -5,7 +5,8 @@ from financial_analysis import (
     sum_spending_for_year, sum_spending_for_day, sum_spending_in_date_range,
     sum_spending_for_month, sum_spending_in_category,
     sum_spending_in_category_and_date_range, generate_spending_insights,
-    capture_display_transactions, save_output_to_file
+    capture_display_transactions, save_output_to_file,
+    add_transaction_to_database, import_transactions_to_database
 )
 from trans_budget import (
     handle_add_transaction, handle_view_all_transactions, handle_view_all_budgets, handle_update_budget
@@ -73,7 +74,7 @@ class FinancialAnalysisApp:
 
     def setup_transaction_tab(self):
         ttk.Button(self.transaction_tab, text="View All Transactions", command=lambda: handle_view_all_transactions(self.trans_path, self.transaction_output_text)).pack(pady=15)
-        ttk.Button(self.transaction_tab, text="Add Transaction", command=lambda: handle_add_transaction(self.trans_path,self.budget_path, self.transaction_output_text)).pack(pady=15)
+        ttk.Button(self.transaction_tab, text="Add Transaction", command=lambda: handle_add_transaction(self.trans_path,self.budget_path, self.transaction_output_text, add_transaction_to_database)).pack(pady=15)
         ttk.Button(self.transaction_tab, text="View All Budgets", command=lambda: handle_view_all_budgets(self.budget_path, self.transaction_output_text)).pack(pady=15)
         ttk.Button(self.transaction_tab, text="Update Budget Limit", command=lambda: handle_update_budget(self.budget_path, self.transaction_output_text)).pack(pady=15)
 
@@ -101,7 +102,7 @@ class FinancialAnalysisApp:
         ttk.Button(self.savings_tab, text="Reset Savings Goal Progress", command=lambda: reset_all_goal_progress(self.saving_goal_path)).pack(pady=15)
 
     def setup_import_export_tab(self):
-        ttk.Button(self.import_export_tab, text="Import Transactions", command=import_transactions).pack(pady=15)
+        ttk.Button(self.import_export_tab, text="Import Transactions", command=lambda: import_transactions(import_transactions_to_database)).pack(pady=15)
         ttk.Button(self.import_export_tab, text="Export Transactions", command=export_transactions).pack(pady=15)
         ttk.Button(self.import_export_tab, text="Export financial_file", command=export_financial).pack(pady=15)
 
@@ -4,9 +4,14 @@ from datetime import datetime
 from collections import namedtuple
 from typing import List, Optional, Callable, Any
 
+from sqlite_store import is_sqlite_path, with_database, load_goals, insert_goals, add_goal_progress, reset_goals_progress
+
 SavingsGoal = namedtuple("SavingsGoal", ["name", "target_amount", "target_date", "progress"])
 
 def load_savings_goals(file_path: str) -> List[SavingsGoal]:
+    if is_sqlite_path(file_path):
+        return [SavingsGoal(**goal) for goal in with_database(file_path, load_goals)]
+
     def recursive_load(data):
         if not data:
             return []
@@ -75,7 +80,10 @@ def add_savings_goal(file_path: str) -> List[SavingsGoal]:
         return savings_goals
 
     updated_goals = savings_goals + [new_goal]
-    save_data(file_path, updated_goals)
+    if is_sqlite_path(file_path):
+        with_database(file_path, insert_goals, [new_goal._asdict()])
+    else:
+        save_data(file_path, updated_goals)
     messagebox.showinfo("Success", f"Savings goal '{new_goal.name}' added successfully.")
     return updated_goals
 
@@ -83,6 +91,11 @@ def reset_goal_progress(goal: SavingsGoal) -> SavingsGoal:
     return goal._replace(progress=0)
 
 def reset_all_goal_progress(file_path: str):
+    if is_sqlite_path(file_path):
+        with_database(file_path, reset_goals_progress)
+        messagebox.showinfo("Success", "All savings goals have been reset to 0 progress.")
+        return
+
     savings_goals = load_savings_goals(file_path)
 
     def recursive_reset(goals, index=0, length=None):
@@ -127,6 +140,13 @@ def update_savings_goal_progress(file_path: str):
         messagebox.showwarning("Input Error", str(e))
         return
 
+    if is_sqlite_path(file_path):
+        if with_database(file_path, add_goal_progress, goal_name, progress_update):
+            messagebox.showinfo("Success", f"Progress for '{goal_name}' updated successfully.")
+        else:
+            messagebox.showwarning("Update Error", "Invalid progress update. Check the target amount.")
+        return
+
     savings_goals = load_savings_goals(file_path)
 
     def recursive_update(goals, index, length):
@@ -0,0 +1,188 @@
+"""Fixed-width binary ledger opened through mmap.
+
+The file holds the columns of a ColumnarStore, int32 day ordinals, int64 amounts in cents, uint8 types, uint16
+category ids (and uint8 months), with the rows sorted by (category, day), followed by prefix sums of the expense amounts and
+a small JSON table of the type and category names, the month cube and the category totals. Opening a ledger maps
+the file and casts the columns to memoryviews, so nothing is parsed or copied whatever the number of rows, and
+processes opening the same file share its pages.
+Export a ledger with: python binary_ledger.py export <ledger.json> <ledger.ledger>
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from datetime import date
+from itertools import accumulate
+from typing import Any, Dict, Iterable, Iterator
+
+from money import cents_to_amount
+from ledger_store import ColumnarStore, DateIndex, LedgerAggregates, build_aggregates, take_rows
+from trans_budget import TransactionType, iter_data
+
+LEDGER_EXTENSION = ".ledger"
+
+MAGIC = b"FALEDGR2"
+
+# magic, number of rows, number of expense rows, offset and length of the JSON table
+HEADER = struct.Struct("<8sQQQQ")
+
+# (column, typecode, length) in file order; the int64 columns come first so every column starts aligned to its
+# item size. The prefix columns are the running expense totals of the date indexes: category_prefix over the rows
+# in file order (one index per category run), expense_prefix with expense_days over every expense sorted by day.
+# rows and expenses are the row counts of the store and of the all-categories date index.
+COLUMNS = [
+    ("amounts", "q", "rows"),
+    ("category_prefix", "q", "rows+1"),
+    ("expense_prefix", "q", "expenses+1"),
+    ("days", "i", "rows"),
+    ("expense_days", "i", "expenses"),
+    ("categories", "H", "rows"),
+    ("types", "B", "rows"),
+    ("months", "B", "rows"),
+]
+
+
+def is_binary_ledger_path(file_path: str) -> bool:
+    return isinstance(file_path, str) and file_path.lower().endswith(LEDGER_EXTENSION)
+
+
+def column_length(length: str, rows: int, expenses: int) -> int:
+    return {"rows": rows, "rows+1": rows + 1, "expenses": expenses, "expenses+1": expenses + 1}[length]
+
+
+# write the aggregates of a ledger as a binary ledger; the file is written next to its destination and moved
+# into place, so a reader never maps a half written file
+def write_binary_ledger(file_path: str, aggregates: LedgerAggregates) -> int:
+    store = aggregates.store
+    # the rows come sorted by day, a stable sort by category keeps them sorted by day within each category
+    store = take_rows(store, sorted(range(len(store.days)), key=store.categories.__getitem__))
+    expense_code = store.type_codes.get(TransactionType["EXPENSE"])
+    expense_amounts = (amount if type_code == expense_code else 0 for amount, type_code in zip(store.amounts, store.types))
+    category_starts = [bisect_left(store.categories, code) for code in range(len(store.category_names) + 1)]
+    expense_index = aggregates.date_indexes[None]
+
+    columns = {
+        "amounts": store.amounts,
+        "category_prefix": array("q", accumulate(expense_amounts, initial=0)),
+        "expense_prefix": expense_index.totals,
+        "days": store.days,
+        "expense_days": expense_index.days,
+        "categories": store.categories,
+        "types": store.types,
+        "months": store.months,
+    }
+    table = json.dumps({
+        "type_names": store.type_names,
+        "category_names": store.category_names,
+        "category_starts": category_starts,
+        "month_cube": [[category, year, month, total] for (category, year, month), total in aggregates.month_cube.items()],
+        "category_totals": aggregates.category_totals,
+    }).encode("utf-8")
+
+    rows, expenses = len(store.days), len(expense_index.days)
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp")
+    try:
+        with open(descriptor, "wb") as file:
+            file.write(b"\0" * HEADER.size)
+            for name, typecode, _ in COLUMNS:
+                column = columns[name]
+                if sys.byteorder == "big":
+                    column = array(typecode, column)
+                    column.byteswap()
+                column.tofile(file)
+            table_offset = file.tell()
+            file.write(table)
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, rows, expenses, table_offset, len(table)))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    return rows
+
+
+# export a ledger (JSON array file and its log) to a binary ledger, returns the number of rows
+def export_binary_ledger(transactions: Iterable[Dict[str, Any]], file_path: str) -> int:
+    return write_binary_ledger(file_path, build_aggregates(transactions))
+
+
+# map a binary ledger and return its aggregates: the store and the date indexes are memoryviews of the mapping,
+# which stays open as long as they are referenced
+def open_binary_ledger(file_path: str) -> LedgerAggregates:
+    if sys.byteorder == "big":
+        raise ValueError("Binary ledgers are little-endian and can only be mapped on little-endian machines.")
+    with open(file_path, "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    magic, rows, expenses, table_offset, table_length = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"{file_path} is not a binary ledger.")
+
+    columns, offset = {}, HEADER.size
+    for name, typecode, length in COLUMNS:
+        size = array(typecode).itemsize * column_length(length, rows, expenses)
+        columns[name] = view[offset:offset + size].cast(typecode)
+        offset += size
+    table = json.loads(bytes(view[table_offset:table_offset + table_length]))
+
+    type_names, category_names = table["type_names"], table["category_names"]
+    store = ColumnarStore(columns["amounts"], columns["days"], columns["months"], columns["types"], columns["categories"],
+                          type_names, category_names, {name: code for code, name in enumerate(type_names)},
+                          {name: code for code, name in enumerate(category_names)})
+
+    # each category is a run of rows sorted by day, its date index is a slice of the columns
+    starts = table["category_starts"]
+    date_indexes = {None: DateIndex(columns["expense_days"], columns["expense_prefix"])}
+    date_indexes.update(
+        (category, DateIndex(columns["days"][starts[code]:starts[code + 1]], columns["category_prefix"][starts[code]:starts[code + 1] + 1]))
+        for code, category in enumerate(category_names)
+    )
+    month_cube = {(category, year, month): total for category, year, month, total in table["month_cube"]}
+    category_rows = {category: starts[code + 1] - starts[code] for code, category in enumerate(category_names)
+                     if starts[code + 1] > starts[code]}
+    return LedgerAggregates(store, date_indexes, {}, month_cube, table["category_totals"], category_rows)
+
+
+def is_mapped(aggregates: LedgerAggregates) -> bool:
+    return isinstance(aggregates.store.amounts, memoryview)
+
+
+# copy the mapped store into arrays so that rows can be added; the date indexes stay mapped, later changes
+# go into the Fenwick deltas as for any ledger
+def writable_aggregates(aggregates: LedgerAggregates) -> LedgerAggregates:
+    if not is_mapped(aggregates):
+        return aggregates
+    store = aggregates.store
+    def copy(column):
+        copied = array(column.format)
+        copied.frombytes(column.cast("B"))
+        return copied
+    return aggregates._replace(store=store._replace(
+        amounts=copy(store.amounts), days=copy(store.days), months=copy(store.months),
+        types=copy(store.types), categories=copy(store.categories),
+        type_names=list(store.type_names), category_names=list(store.category_names),
+        type_codes=dict(store.type_codes), category_codes=dict(store.category_codes),
+    ))
+
+
+# the rows of a store as transaction dicts, with canonical dates ("" for a date that did not parse)
+def iter_store_transactions(store: ColumnarStore) -> Iterator[Dict[str, Any]]:
+    for amount, day, type_code, category_code in zip(store.amounts, store.days, store.types, store.categories):
+        yield {
+            "category": store.category_names[category_code],
+            "amount": cents_to_amount(amount),
+            "type": store.type_names[type_code],
+            "date": date.fromordinal(day).isoformat() if day else "",
+        }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "export":
+        sys.exit("usage: python binary_ledger.py export <ledger.json> <ledger.ledger>")
+    print(f"{export_binary_ledger(iter_data(sys.argv[2]), sys.argv[3])} transactions exported to {sys.argv[3]}")
@@ -0,0 +1,155 @@
+"""Self-describing binary columnar file for exchanging ledger snapshots.
+
+The rows are sorted by date and cut into blocks of BLOCK_ROWS rows. Each block stores its columns one after
+the other, each compressed with zlib: int32 day ordinals (0 for a date that did not parse), int64 amounts in
+cents, uint8 type codes and uint16 category codes. The type and category names are dictionaries kept once
+in the footer, a JSON document at the end of the file that also gives, for every block, its row count, the
+smallest and largest day of its dated rows, the offset and length of each column and the text of the dates
+that did not parse. A reader looking for a date range only reads and decompresses the blocks it overlaps.
+Layout: MAGIC, the blocks, the footer, the footer length as a little-endian uint64, MAGIC.
+"""
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from ledger_store import append_parsed_row, empty_store, take_rows
+from money import cents_to_amount
+from trans_budget import parse_canonical_date
+
+COLUMNAR_EXTENSION = ".col"
+
+MAGIC = b"FACOLS01"
+
+FOOTER_LENGTH = struct.Struct("<Q")
+
+# rows per block: large enough to compress well, small enough to skip most of a year of data by month
+BLOCK_ROWS = 1 << 14
+
+COMPRESSION_LEVEL = 6
+
+# (column, typecode) in block order, the fields of ColumnarStore they are written from
+COLUMNS = [("days", "i"), ("amounts", "q"), ("types", "B"), ("categories", "H")]
+
+
+def is_columnar_path(file_path: str) -> bool:
+    return isinstance(file_path, str) and file_path.lower().endswith(COLUMNAR_EXTENSION)
+
+
+def encode_column(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return zlib.compress(column.tobytes(), COMPRESSION_LEVEL)
+
+
+def decode_column(data: bytes, typecode: str) -> array:
+    column = array(typecode)
+    column.frombytes(zlib.decompress(data))
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+# write transactions to a columnar file, returns the number of rows; the file is written next to its
+# destination and moved into place
+def write_columnar(transactions: Iterable[Dict[str, Any]], file_path: str) -> int:
+    store, raw_dates = empty_store(), {}
+    for transaction in transactions:
+        date_str = transaction["date"]
+        parsed = parse_canonical_date(date_str) if isinstance(date_str, str) else None
+        if parsed is None:
+            raw_dates[len(store.days)] = str(date_str)
+        append_parsed_row(store, transaction, parsed)
+    order = sorted(range(len(store.days)), key=store.days.__getitem__)
+    raw_dates = {position: raw_dates[row] for position, row in enumerate(order) if row in raw_dates}
+    store = take_rows(store, order)
+
+    blocks = []
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp")
+    try:
+        with open(descriptor, "wb") as file:
+            file.write(MAGIC)
+            for start in range(0, len(store.days), BLOCK_ROWS):
+                end = min(start + BLOCK_ROWS, len(store.days))
+                dated = [day for day in store.days[start:end] if day]
+                block = {"rows": end - start, "min_day": min(dated, default=0), "max_day": max(dated, default=0),
+                         "columns": [], "raw_dates": {str(row - start): raw_dates[row] for row in range(start, end) if row in raw_dates}}
+                for name, _ in COLUMNS:
+                    data = encode_column(getattr(store, name)[start:end])
+                    block["columns"].append([file.tell(), len(data)])
+                    file.write(data)
+                blocks.append(block)
+            footer = json.dumps({
+                "version": 1,
+                "rows": len(store.days),
+                "columns": [{"name": name, "typecode": typecode} for name, typecode in COLUMNS],
+                "type_names": store.type_names,
+                "category_names": store.category_names,
+                "blocks": blocks,
+            }).encode("utf-8")
+            file.write(footer)
+            file.write(FOOTER_LENGTH.pack(len(footer)))
+            file.write(MAGIC)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    return len(store.days)
+
+
+def read_footer(file) -> Dict[str, Any]:
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a columnar ledger file.")
+    file.seek(-(FOOTER_LENGTH.size + len(MAGIC)), os.SEEK_END)
+    (footer_length,), magic = FOOTER_LENGTH.unpack(file.read(FOOTER_LENGTH.size)), file.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError("Truncated columnar ledger file.")
+    file.seek(-(FOOTER_LENGTH.size + len(MAGIC) + footer_length), os.SEEK_END)
+    return json.loads(file.read(footer_length))
+
+
+# yield the transactions of a columnar file in date order, only those of a category and within an inclusive
+# range of dates when given; blocks whose dates all fall outside the range are neither read nor decompressed
+def iter_columnar_file(file_path: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                       category: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    start_day = start_date.toordinal() if start_date else None
+    end_day = end_date.toordinal() if end_date else None
+    with open(file_path, "rb") as file:
+        footer = read_footer(file)
+        type_names, category_names = footer["type_names"], footer["category_names"]
+        if category is not None and category not in category_names:
+            return
+        category_code = category_names.index(category) if category is not None else None
+        names = [(column["name"], column["typecode"]) for column in footer["columns"]]
+
+        for block in footer["blocks"]:
+            if start_day is not None or end_day is not None:
+                if not block["max_day"] or (start_day is not None and block["max_day"] < start_day) \
+                        or (end_day is not None and block["min_day"] > end_day):
+                    continue
+            columns = {}
+            for (offset, length), (name, typecode) in zip(block["columns"], names):
+                file.seek(offset)
+                columns[name] = decode_column(file.read(length), typecode)
+            raw_dates = block["raw_dates"]
+            rows = zip(columns["days"], columns["amounts"], columns["types"], columns["categories"])
+            for row, (day, cents, type_code, row_category) in enumerate(rows):
+                if category_code is not None and row_category != category_code:
+                    continue
+                if (start_day is not None or end_day is not None) and (
+                        not day or (start_day is not None and day < start_day) or (end_day is not None and day > end_day)):
+                    continue
+                yield {
+                    "category": category_names[row_category],
+                    "amount": cents_to_amount(cents),
+                    "type": type_names[type_code],
+                    "date": date.fromordinal(day).isoformat() if day else raw_dates.get(str(row), ""),
+                }
@@ -0,0 +1,111 @@
+from collections import Counter, namedtuple
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Iterable, Optional
+
+# A supported date layout: its strptime format, field order, separator and number of year digits.
+DateLayout = namedtuple("DateLayout", ["format", "order", "separator", "year_digits"])
+
+# Supported layouts in the order the strptime cascade tries them. At most one of them can match
+# a given string (they differ in separator, field order or year width).
+DATE_LAYOUTS = [
+    DateLayout("%d/%m/%Y", "dmy", "/", 4),
+    DateLayout("%Y-%m-%d", "ymd", "-", 4),
+    DateLayout("%d-%m-%Y", "dmy", "-", 4),
+    DateLayout("%d/%m/%y", "dmy", "/", 2),
+    DateLayout("%d-%m-%y", "dmy", "-", 2),
+    # day.month.year, as written by many bank exports
+    DateLayout("%d.%m.%Y", "dmy", ".", 4),
+]
+
+# number of dates looked at to detect the layout of a file
+SAMPLE_SIZE = 200
+
+# number of distinct date strings remembered by each parser
+CACHE_SIZE = 4096
+
+
+# the slow path: try every layout with strptime
+def cascade_parse(date_str: str) -> Optional[datetime]:
+    for layout in DATE_LAYOUTS:
+        try:
+            return datetime.strptime(date_str, layout.format)
+        except ValueError:
+            continue
+    return None
+
+
+# value of a field made of min_width to max_width ASCII digits, None otherwise
+def field_value(field: str, min_width: int, max_width: int) -> Optional[int]:
+    if min_width <= len(field) <= max_width and field.isascii() and field.isdigit():
+        return int(field)
+    return None
+
+
+# the fast path: parse a string written in the given layout with integer slicing, no strptime.
+# Returns None when the string does not follow the layout exactly, the caller then falls back to the cascade.
+def fast_parse(layout: DateLayout, date_str: str) -> Optional[datetime]:
+    separator = layout.separator
+    width = 6 + layout.year_digits
+    if len(date_str) == width:
+        # zero padded: the separators sit at fixed offsets
+        if layout.order == "ymd":
+            if date_str[4] != separator or date_str[7] != separator:
+                return None
+            fields = (date_str[8:], date_str[5:7], date_str[:4])
+        else:
+            if date_str[2] != separator or date_str[5] != separator:
+                return None
+            fields = (date_str[:2], date_str[3:5], date_str[6:])
+    else:
+        parts = date_str.split(separator)
+        if len(parts) != 3:
+            return None
+        fields = (parts[2], parts[1], parts[0]) if layout.order == "ymd" else tuple(parts)
+
+    day = field_value(fields[0], 1, 2)
+    month = field_value(fields[1], 1, 2)
+    year = field_value(fields[2], layout.year_digits, layout.year_digits)
+    if day is None or month is None or year is None:
+        return None
+    if layout.year_digits == 2:
+        # same pivot as strptime's %y
+        year += 1900 if year >= 69 else 2000
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+
+# pick the layout that parses the most of a sample of the date strings, None if none of them parses
+def detect_layout(date_strs: Iterable[str], sample_size: int = SAMPLE_SIZE) -> Optional[DateLayout]:
+    votes = Counter()
+    for date_str in islice(date_strs, sample_size):
+        if not isinstance(date_str, str):
+            continue
+        for layout in DATE_LAYOUTS:
+            if fast_parse(layout, date_str) is not None:
+                votes[layout] += 1
+                break
+    return votes.most_common(1)[0][0] if votes else None
+
+
+# build a date parser specialized for a layout: the fast path of that layout first, then the fast paths of
+# the other layouts and finally the strptime cascade for outliers; results are kept in a small LRU cache
+def make_date_parser(layout: Optional[DateLayout] = None, cache_size: int = CACHE_SIZE) -> Callable[[str], Optional[datetime]]:
+    layouts = ([layout] if layout else []) + [other for other in DATE_LAYOUTS if other != layout]
+
+    @lru_cache(maxsize=cache_size)
+    def parse(date_str: str) -> Optional[datetime]:
+        for candidate in layouts:
+            parsed = fast_parse(candidate, date_str)
+            if parsed is not None:
+                return parsed
+        return cascade_parse(date_str)
+
+    return parse
+
+
+# parser for strings without a known file layout
+parse_any_date = make_date_parser()
@@ -0,0 +1,57 @@
+"""Persistent content-hash index of the transactions of a ledger, used to skip duplicates on import.
+
+The hashes of the normalized transactions are kept in a file next to the ledger (see transaction_hashes);
+when it no longer matches the ledger files (they were changed by something that did not record its rows)
+the index is rebuilt from the ledger once. Loaded, the index is a Counter of hashes, so checking a row is O(1).
+An incoming row is a duplicate while the ledger holds more copies of it than the file has already matched,
+so overlapping exports are skipped while two identical purchases within one export are both kept.
+"""
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from binary_ledger import is_binary_ledger_path, iter_store_transactions, open_binary_ledger
+from sqlite_store import is_sqlite_path, iter_transaction_rows, with_database
+from trans_budget import iter_data
+from transaction_hashes import read_index, transaction_key, write_index
+from transaction_log import iter_log, log_file_path
+
+
+# every transaction of a ledger, whatever its storage
+def iter_database_transactions(database_file: str) -> Iterator[Dict[str, Any]]:
+    if is_sqlite_path(database_file):
+        yield from with_database(database_file, lambda connection: list(iter_transaction_rows(connection)))
+    elif is_binary_ledger_path(database_file):
+        if os.path.exists(database_file):
+            yield from iter_store_transactions(open_binary_ledger(database_file).store)
+        yield from iter_log(log_file_path(database_file))
+    else:
+        yield from iter_data(database_file)
+
+
+# the hashes of the transactions of a ledger, read from its index file or rebuilt (and saved) if it is stale
+def load_index(database_file: str) -> Counter:
+    index = read_index(database_file)
+    if index is None:
+        digests = [transaction_key(transaction) for transaction in iter_database_transactions(database_file)]
+        write_index(database_file, digests)
+        index = Counter(digests)
+    return index
+
+
+# split transactions of a file into the new ones and the number of duplicates: a transaction is a duplicate
+# while the file has matched fewer copies of it than the index holds. matched counts the copies matched by the
+# file so far, pass the same Counter for every chunk of a file. Returns the new transactions with their hashes.
+def skip_duplicates(
+    index: Counter, transactions: Iterable[Dict[str, Any]], matched: Counter
+) -> Tuple[List[Dict[str, Any]], List[bytes], int]:
+    fresh, digests, duplicates = [], [], 0
+    for transaction in transactions:
+        digest = transaction_key(transaction)
+        if matched[digest] < index[digest]:
+            matched[digest] += 1
+            duplicates += 1
+        else:
+            fresh.append(transaction)
+            digests.append(digest)
+    return fresh, digests, duplicates
@@ -1,25 +1,164 @@
 import json
 from datetime import datetime
+from functools import reduce
+from itertools import chain, islice
+import os
 import sys
 
 # Add the path to sys.path
 sys.path.append(r"..\..\Concept_project\functional")
 
 # Import the necessary functions
-from trans_budget import load_data, save_data, format_transactions, parse_date
+from trans_budget import load_data, format_transactions, parse_date, parse_canonical_date, normalize_dates
+from ledger_store import (
+    build_aggregates, build_file_aggregates, add_to_aggregates, remove_from_aggregates, aggregate_range_total, month_total,
+    has_category_rows, sum_expenses
+)
+from transaction_log import write_transactions, iter_log, log_file_path
+from money import cents_to_amount, format_cents, to_cents
+import sqlite_store
+from binary_ledger import (
+    is_binary_ledger_path, open_binary_ledger, export_binary_ledger, is_mapped, writable_aggregates, iter_store_transactions
+)
+from query_cache import create_query_cache, cached_query, cache_info, cache_clear
 
 transaction_file_path=r"F:\study\level 4\Concept\Concept_project (2)\Concept_project\functional\JSON\transactions.json"
 
+# the database and its aggregates are loaded on first use, importing this module does no I/O.
+# The aggregates are built by streaming the file, the list of transaction dicts is only loaded when needed.
+transaction_database = None
+ledger = None
+ledger_version = 0
+
+# the SQLite database of the transactions when transaction_file_path names one, None for JSON ledgers.
+# With SQLite the queries run in the database and there is no ledger nor transaction list to keep in memory.
+sqlite_connection = None
+sqlite_connection_path = None
+
+def get_sqlite_connection():
+    global sqlite_connection, sqlite_connection_path
+    if not sqlite_store.is_sqlite_path(transaction_file_path):
+        return None
+    if sqlite_connection_path != transaction_file_path:
+        if sqlite_connection is not None:
+            sqlite_connection.close()
+        sqlite_connection = sqlite_store.connect(transaction_file_path)
+        sqlite_connection_path = transaction_file_path
+    return sqlite_connection
+
+def get_ledger():
+    if ledger is None:
+        rebuild_ledger()
+    return ledger
+
+def get_transaction_database():
+    global transaction_database
+    connection = get_sqlite_connection()
+    if connection is not None:
+        return list(sqlite_store.iter_transaction_rows(connection))
+    if transaction_database is None and is_binary_ledger_path(transaction_file_path):
+        transaction_database = list(iter_store_transactions(get_ledger().store))
+    if transaction_database is None:
+        transaction_database = load_data(transaction_file_path)
+    return transaction_database
+
+# the version also follows commits of other connections to a SQLite database
+def current_ledger_version():
+    connection = get_sqlite_connection()
+    if connection is not None:
+        return ledger_version, sqlite_store.data_version(connection)
+    get_ledger()
+    return ledger_version
+
+# results of the sum_spending_* queries, keyed by the ledger version so any change of the ledger invalidates them
+query_cache = create_query_cache()
+cached = cached_query(query_cache, current_ledger_version)
+
+# inspect the hit/miss counters of the query cache
+def query_cache_info():
+    return cache_info(query_cache)
+
+def clear_query_cache():
+    cache_clear(query_cache)
+
+# rewrite the ledger file with the loaded database, which also folds in and empties the transaction log
 def save_database_to_file():
-    save_data(transaction_file_path, transaction_database)
+    if get_sqlite_connection() is not None:
+        return  # every write to the database is already committed
+    if is_binary_ledger_path(transaction_file_path):
+        export_binary_ledger(get_transaction_database(), transaction_file_path)
+        if os.path.exists(log_file_path(transaction_file_path)):
+            os.remove(log_file_path(transaction_file_path))
+    else:
+        write_transactions(transaction_file_path, get_transaction_database())
 
-def load_database_from_file():
+# (re)load the database, with workers > 1 the month partitions are aggregated by a process pool
+def load_database_from_file(workers=None):
     global transaction_database
-    transaction_database = load_data(transaction_file_path)
+    transaction_database = None
+    rebuild_ledger(workers)
+
+# aggregate the database from scratch, streaming the file unless the transaction list is already loaded (with
+# workers > 1, byte ranges of the file are parsed by that many processes);
+# a binary ledger is mapped as it is, its aggregates are stored in the file, and the transactions added to
+# its log since it was written are applied on top
+def rebuild_ledger(workers=None):
+    global ledger, ledger_version
+    if get_sqlite_connection() is not None:
+        ledger = None
+        ledger_version += 1
+        return
+    if transaction_database is None and is_binary_ledger_path(transaction_file_path):
+        ledger = open_binary_ledger(transaction_file_path)
+        logged = normalize_dates(list(iter_log(log_file_path(transaction_file_path))))
+        if logged:
+            ledger = writable_aggregates(ledger)
+            for transaction in logged:
+                add_to_aggregates(ledger, transaction)
+        ledger_version += 1
+        return
+    if transaction_database is not None:
+        ledger = build_aggregates(transaction_database, workers)
+    else:
+        ledger = build_file_aggregates(transaction_file_path, workers)
+    ledger_version += 1
+
+# a mapped binary ledger is read-only: its rows become the transaction list and its store is copied before a change
+def make_ledger_writable():
+    global ledger
+    if ledger is not None and is_mapped(ledger):
+        get_transaction_database()
+        ledger = writable_aggregates(ledger)
+
+# add transactions that were already saved to transaction_file_path: whatever is loaded (the transaction list,
+# the aggregates) is updated in place, whatever is not loaded yet will read them from the file
+def import_transactions_to_database(transactions):
+    global ledger_version
+    make_ledger_writable()
+    for transaction in normalize_dates(list(transactions)):
+        if transaction_database is not None:
+            transaction_database.append(transaction)
+        if ledger is not None:
+            add_to_aggregates(ledger, transaction)
+    ledger_version += 1
+
+def add_transaction_to_database(transaction):
+    import_transactions_to_database([transaction])
+
+# remove a transaction that was already removed from transaction_file_path from whatever is loaded
+def remove_transaction_from_database(transaction):
+    global ledger_version
+    transaction = normalize_dates([transaction])[0]
+    make_ledger_writable()
+    if transaction_database is not None:
+        transaction_database.remove(transaction)
+    if ledger is not None:
+        remove_from_aggregates(ledger, transaction)
+    ledger_version += 1
 
 def display_transactions():
     print("Current Transaction Database:")
-    format_transactions(transaction_database)
+    format_transactions(get_transaction_database())
 
 
 ############
@@ -92,89 +231,129 @@ def is_in_category(category, head_category):
 
 # check if category exists
 def category_exist(category, transactions):
-    if not transactions:
-        return False
-    if transactions[0]["category"] == category:
-        return True
-    return category_exist(category, transactions[1:])
-
-# calculate total spending
+    return any(transaction["category"] == category for transaction in transactions or [])
+
+# fold a step function over transactions, in constant stack depth and one linear pass
+def fold_transactions(step, initial, transactions, index=0):
+    return reduce(step, islice(transactions or [], index, None), initial)
+
+# build the predicate selecting expenses that match already parsed bounds
+def spending_predicate(category, start_date, end_date, month):
+    def matches(transaction):
+        if transaction['type'] != "Expense" or not is_in_category(category, transaction['category']):
+            return False
+        transaction_date = parse_canonical_date(transaction['date'])
+        return is_date_within_range(transaction_date, start_date, end_date) and is_in_month(transaction_date, month)
+    return matches
+
+# calculate total spending, the query bounds are parsed once and each transaction date once;
+# the amounts are summed in integer cents
 def calc_spending(transactions, category, start_date_str, end_date_str, month, current_sum=0.0, index=0):
-    parsed_start_d = parse_date(start_date_str)
-    parsed_end_d = parse_date(end_date_str)
-
-    if transactions is None or transactions[index:] == []:
-        return current_sum
+    parsed_start_d = parse_canonical_date(start_date_str) if start_date_str else None
+    parsed_end_d = parse_canonical_date(end_date_str) if end_date_str else None
+    matches = spending_predicate(category, parsed_start_d, parsed_end_d, month)
 
-    transaction = transactions[index]
-    date_within_range = is_date_within_range(parse_date(transaction['date']), parsed_start_d, parsed_end_d)
-    in_month = is_in_month(parse_date(transaction['date']), month)
-    in_category = is_in_category(category, transaction['category'])
+    def add_spending(total, transaction):
+        return total + to_cents(transaction['amount']) if matches(transaction) else total
 
-    if transaction['type'] == "Expense" and in_category and date_within_range and in_month:
-        current_sum += transaction['amount']
+    return cents_to_amount(fold_transactions(add_spending, to_cents(current_sum), transactions, index))
 
-    return calc_spending(transactions, category, start_date_str, end_date_str, month, current_sum, index+1)
+# convert a date string to a day ordinal, None if empty or invalid
+def to_day(date_str):
+    date = parse_date(date_str)
+    return date.toordinal() if date else None
+
+# spending of every category ("" for all) in each month of the year, summed over the years in one pass over the month cube
+@cached
+def get_month_totals():
+    connection = get_sqlite_connection()
+    if connection is not None:
+        return sqlite_store.month_totals(connection)
+    totals = {}
+    for (category, year, month), total in get_ledger().month_cube.items():
+        totals[category, month] = totals.get((category, month), 0) + total
+    return totals
+
+# convert a day ordinal to a YYYY-MM-DD string, None stays None
+def to_iso_date(day):
+    return datetime.fromordinal(day).date().isoformat() if day is not None else None
+
+# calculate total spending in cents over the loaded database, date ranges are answered by the date index
+# and whole months by the month cube, only months within a date range need a scan; SQLite sums in SQL
+def calc_store_spending(category, start_date_str, end_date_str, month):
+    start_day, end_day = to_day(start_date_str), to_day(end_date_str)
+    connection = get_sqlite_connection()
+    if connection is not None:
+        return sqlite_store.sum_expenses(connection, category, to_iso_date(start_day), to_iso_date(end_day), month)
+    if month == 0:
+        return aggregate_range_total(get_ledger(), category, start_day, end_day)
+    if start_day is None and end_day is None:
+        return get_month_totals().get((category, month), 0)
+    return sum_expenses(get_ledger().store, category, start_day, end_day, month)
 
 
 # sum spending for a specific year 
+@cached
 def sum_spending_for_year(year):
     start_date = datetime(year, 1, 1)
     end_date = datetime(year, 12, 31)
 
     #strftime converts the date to string to match its result with database
-    total_spending = calc_spending(transaction_database, "", start_date.strftime("%d/%m/%Y"), end_date.strftime("%d/%m/%Y"), 0)
-    return f"Total spending for year {year}: {total_spending:.2f}"
+    total_spending = calc_store_spending("", start_date.strftime("%d/%m/%Y"), end_date.strftime("%d/%m/%Y"), 0)
+    return f"Total spending for year {year}: {format_cents(total_spending)}"
 
 # sum spending for a specific day 
+@cached
 def sum_spending_for_day(date_str):
     # it converts the string to a datetime
     date = parse_date(date_str)
     if date:
-        total_spending = calc_spending(transaction_database, "", date.strftime("%d/%m/%Y"), date.strftime("%d/%m/%Y"), 0)
-        return f"Total spending for day {date.day:02d}/{date.month:02d}/{date.year}: {total_spending:.2f}"
+        total_spending = calc_store_spending("", date.strftime("%d/%m/%Y"), date.strftime("%d/%m/%Y"), 0)
+        return f"Total spending for day {date.day:02d}/{date.month:02d}/{date.year}: {format_cents(total_spending)}"
     else:
         return "Invalid date format. Please use one of the supported formats."
 
 # sum spending in a date range 
+@cached
 def sum_spending_in_date_range(start_date, end_date):
-    total_spending = calc_spending(transaction_database, "", start_date, end_date, 0)
+    total_spending = calc_store_spending("", start_date, end_date, 0)
     if start_date == "" and end_date == "":
-        return f"Total spending (from beginning to now): {total_spending:.2f}"
+        return f"Total spending (from beginning to now): {format_cents(total_spending)}"
     elif start_date == "":
-        return f"Total Spending (from beginning to {end_date}): {total_spending:.2f}"
+        return f"Total Spending (from beginning to {end_date}): {format_cents(total_spending)}"
     elif end_date == "":
-        return f"Total Spending (from {start_date} to now): {total_spending:.2f}"
+        return f"Total Spending (from {start_date} to now): {format_cents(total_spending)}"
     else:
-        return f"Total Spending (from {start_date} to {end_date}): {total_spending:.2f}"
+        return f"Total Spending (from {start_date} to {end_date}): {format_cents(total_spending)}"
 
 # sum spending in a specific month 
+@cached
 def sum_spending_for_month(month):
-    total_spending = calc_spending(transaction_database, "", "", "", month)
-    return f"Total Spending in Month {month}: {total_spending:.2f}"
+    total_spending = calc_store_spending("", "", "", month)
+    return f"Total Spending in Month {month}: {format_cents(total_spending)}"
 
 # sum spending in a specific category 
+@cached
 def sum_spending_in_category(category):
-    if category_exist(category, transaction_database):
-        total_spending = calc_spending(transaction_database, category, "", "", 0)
-        return f"Total Spending of {category}: {total_spending:.2f}"
+    if category_exists(category):
+        total_spending = calc_store_spending(category, "", "", 0)
+        return f"Total Spending of {category}: {format_cents(total_spending)}"
     else:
         return f"Sorry, the category {category} does not exist."
 
 # sum spending in a specific category and month 
+@cached
 def sum_spending_in_category_and_month(category, month_year_str, print_total):
     date = try_parse_month_year(month_year_str)
     if date:
         month = date.month
         year = date.year
-        start_date = datetime(year, month, 1).strftime("%d/%m/%Y")
-        end_date = datetime(year, month, 28).strftime("%d/%m/%Y")  # Assume max 28 days for simplicity
-        total_spending = calc_spending(transaction_database, category, start_date, end_date, month)
+        total_spending = category_month_total(category, year, month)
 
-        if category_exist(category, transaction_database):
+        if category_exists(category):
             if print_total:
-                return f"Total Spending of {category} in {month:02d}/{year}: {total_spending:.2f}"
-            return total_spending    
+                return f"Total Spending of {category} in {month:02d}/{year}: {format_cents(total_spending)}"
+            return cents_to_amount(total_spending)
         else:
             if print_total:
                 return f"Sorry, the category {category} does not exist."
@@ -184,55 +363,72 @@ def sum_spending_in_category_and_month(category, month_year_str, print_total):
         return 0.0
 
 # calculate total spending in a specific category and date range 
+@cached
 def sum_spending_in_category_and_date_range(category, start_date, end_date):
-    if category_exist(category, transaction_database):
-        total_spending = calc_spending(transaction_database, category, start_date, end_date, 0)
-        return f"Total Spending of {category} (from {start_date} to {end_date}): {total_spending:.2f}"
+    if category_exists(category):
+        total_spending = calc_store_spending(category, start_date, end_date, 0)
+        return f"Total Spending of {category} (from {start_date} to {end_date}): {format_cents(total_spending)}"
     else:
         return f"Sorry, the category {category} does not exist."
 
 
 # add an element to a list 
 def add_to_list(listt, element):
-    if listt == []:
-        return [element]  
-    elif listt[0] == element:
-        return listt 
-    else:
-        return [listt[0]] + add_to_list(listt[1:], element)  
+    if element in listt:
+        return listt
+    return listt + [element]
 
-# get categories
+# get categories in order of first appearance
 def get_categories(transactions, x=None):
     if x is None:
         x = []
-    if not transactions:
-        return x  
-
-    return get_categories(transactions[1:], add_to_list(x, transactions[0]['category']))
+    return list(dict.fromkeys(chain(x, (transaction['category'] for transaction in transactions or []))))
 
 
 # get length of list 
 def get_length(list):
-    if list == []:  
-        return 0
-    else:
-        return 1 + get_length(list[1:])  
-
+    return len(list)
+
+# check if a category exists in the database
+def category_exists(category):
+    connection = get_sqlite_connection()
+    if connection is not None:
+        return sqlite_store.has_category(connection, category)
+    return has_category_rows(get_ledger(), category)
+
+# categories of the database in order of first appearance
+def get_category_names():
+    connection = get_sqlite_connection()
+    if connection is not None:
+        return sqlite_store.category_names(connection)
+    ledger = get_ledger()
+    return [category for category in ledger.store.category_names if has_category_rows(ledger, category)]
+
+# spending of a category ("" for all) in a month of a year
+def category_month_total(category, year, month):
+    connection = get_sqlite_connection()
+    if connection is not None:
+        return sqlite_store.month_expenses(connection, category, year, month)
+    return month_total(get_ledger().month_cube, category, year, month)
+
+# total expenses of every category, "" keeps its meaning of any category
+def get_category_totals():
+    connection = get_sqlite_connection()
+    category_totals = sqlite_store.category_totals(connection) if connection is not None else get_ledger().category_totals
+    totals = dict(category_totals)
+    totals[""] = sum(category_totals.values())
+    return totals
+
+@cached
 def print_total_spending(categories=None, index=0):
     if categories is None:
-        categories = get_categories(transaction_database)
-
-    if index >= get_length(categories):
-        return []  
-
-    category = categories[index]
-    total_spending = calc_spending(transaction_database, category, "", "", 0)
-
-    current_output = []
-    if total_spending > 0.0:
-        current_output = [f"Total Spending of {category}: {total_spending:.2f}"]
+        categories = get_category_names()
 
-    return current_output + print_total_spending(categories, index + 1)
+    totals = get_category_totals()
+    return [
+        f"Total Spending of {category}: {format_cents(totals.get(category, 0))}"
+        for category in categories[index:] if totals.get(category, 0) > 0
+    ]
 
 # Calculate percentage change 
 def calculate_percentage_change(old_value, new_value):
@@ -246,20 +442,10 @@ def get_current_month_categories(transaction_database, current_month, current_ye
         categories = get_categories(transaction_database)
         current_month_categories = []
 
-    # Base case: If we've checked all categories
-    if index >= get_length(categories):
-        return current_month_categories
-
-    # Get the current category
-    category = categories[index]
-    current_spending = sum_spending_in_category_and_month(category, f"{current_month}-{current_year}", False)
-
-    # Create a new list for current_month_categories
-    if current_spending > 0:
-        current_month_categories = current_month_categories + [category]  
-
-    # Recursive call for the next category
-    return get_current_month_categories(transaction_database, current_month, current_year, categories, index + 1, current_month_categories)
+    return current_month_categories + [
+        category for category in categories[index:]
+        if sum_spending_in_category_and_month(category, f"{current_month}-{current_year}", False) > 0
+    ]
 
 # Print spending insights
 def print_spending_insight(change, category, month_year=None):
@@ -294,34 +480,22 @@ def generate_spending_insights_for_all_categories(current_month=None, current_ye
         current_month = datetime.now().month
         current_year = datetime.now().year
 
-    # Get categories for the current month only 
-    categories = get_current_month_categories(transaction_database, current_month, current_year)
-
-    # Base case: If we've processed all categories
-    if index >= get_length(categories):
-        return insights
-
-    # Get the current category
-    category = categories[index]
-    current_spending = sum_spending_in_category_and_month(category, f"{current_month}-{current_year}", False)
+    # Get categories for the current month only, once for the whole run
+    categories = get_current_month_categories(None, current_month, current_year, get_category_names(), 0, [])
     previous_month = current_month - 1 if current_month > 1 else 12
     previous_year = current_year if current_month > 1 else current_year - 1
-    previous_spending = sum_spending_in_category_and_month(category, f"{previous_month}-{previous_year}", False)
 
-    # Calculate change
-    change = calculate_percentage_change(previous_spending, current_spending)
-
-    # Generate insight statement 
-    insight_statement = print_spending_insight(change, category)
-
-    # Create the current insight
-    current_insights = insights +[{'category': category, 'insight': insight_statement}]
+    def category_insight(category):
+        current_spending = sum_spending_in_category_and_month(category, f"{current_month}-{current_year}", False)
+        previous_spending = sum_spending_in_category_and_month(category, f"{previous_month}-{previous_year}", False)
+        change = calculate_percentage_change(previous_spending, current_spending)
+        return {'category': category, 'insight': print_spending_insight(change, category)}
 
-    # Recursive call for the next category
-    return generate_spending_insights_for_all_categories(current_month, current_year, index + 1, current_insights)
+    return insights + [category_insight(category) for category in categories[index:]]
 
 
 # Generate spending trends insights 
+@cached
 def generate_spending_insights(category, month_year):
     date = try_parse_month_year(month_year)
     if date:
@@ -341,36 +515,62 @@ def generate_spending_insights(category, month_year):
 
 
 
-def save_output_to_file(output_data, filename=r'F:\study\level 4\Concept\Concept_project (2)\Concept_project\functional\JSON\report2.json'):
+def save_output_to_file(output_data=None, filename=r'F:\study\level 4\Concept\Concept_project (2)\Concept_project\functional\JSON\report2.json', workers=None):
+    if output_data is None:
+        output_data = capture_display_transactions(workers)
     with open(filename, 'w') as f:
         json.dump(output_data, f, indent=4)  
 
-def capture_display_transactions():
-    output_data = {}
-
-    output_data["Total spending"] = sum_spending_in_date_range("","")
-
-    output_data["Total spending by categories"] = print_total_spending()
-
-    output_data["Total spending insights"] = generate_spending_insights_for_all_categories()
-
-    output_data["Total_spending_for_year_2023"] = sum_spending_for_year(2023)
-    output_data["Total_spending_for_year_2024"] = sum_spending_for_year(2024)
-    output_data["For day"]= sum_spending_for_day("7/12/2024")
-    output_data["For 2 days"]= sum_spending_in_date_range("7/11/2024","7/12/2024")
-    output_data['for month']=sum_spending_for_month(12)
-    output_data['for month and category']=sum_spending_in_category_and_month("Food","12-2024",True)
-    output_data["for 1 insigths"]=generate_spending_insights("Food","12-2024")
-    output_data["for another insigths"]=generate_spending_insights("Entertainment","12/2024")
+# queries that can be evaluated by run_query_batch, by name
+BATCH_QUERIES = {
+    "sum_spending_for_year": sum_spending_for_year,
+    "sum_spending_for_day": sum_spending_for_day,
+    "sum_spending_in_date_range": sum_spending_in_date_range,
+    "sum_spending_for_month": sum_spending_for_month,
+    "sum_spending_in_category": sum_spending_in_category,
+    "sum_spending_in_category_and_month": sum_spending_in_category_and_month,
+    "sum_spending_in_category_and_date_range": sum_spending_in_category_and_date_range,
+    "print_total_spending": print_total_spending,
+    "generate_spending_insights": generate_spending_insights,
+    "generate_spending_insights_for_all_categories": generate_spending_insights_for_all_categories,
+}
+
+# evaluate a list of (query name, arguments) specs and return their results in order;
+# the shared aggregates are computed in one pass up front and every query is then an index or cube lookup
+def run_query_batch(queries):
+    unknown = [name for name, _ in queries if name not in BATCH_QUERIES]
+    if unknown:
+        raise ValueError(f"Unknown queries: {', '.join(unknown)}")
+    get_month_totals()
+    return [BATCH_QUERIES[name](*args) for name, args in queries]
+
+# the report written by save_output_to_file: (key, query name, arguments)
+REPORT_QUERIES = [
+    ("Total spending", "sum_spending_in_date_range", ("", "")),
+    ("Total spending by categories", "print_total_spending", ()),
+    ("Total spending insights", "generate_spending_insights_for_all_categories", ()),
+    ("Total_spending_for_year_2023", "sum_spending_for_year", (2023,)),
+    ("Total_spending_for_year_2024", "sum_spending_for_year", (2024,)),
+    ("For day", "sum_spending_for_day", ("7/12/2024",)),
+    ("For 2 days", "sum_spending_in_date_range", ("7/11/2024", "7/12/2024")),
+    ("for month", "sum_spending_for_month", (12,)),
+    ("for month and category", "sum_spending_in_category_and_month", ("Food", "12-2024", True)),
+    ("for 1 insigths", "generate_spending_insights", ("Food", "12-2024")),
+    ("for another insigths", "generate_spending_insights", ("Entertainment", "12/2024")),
+]
+
+# build the report; with workers a ledger that is not loaded yet is parsed and aggregated across that many
+# processes, which gives the same report as the serial path since the partitions do not depend on the worker count
+def capture_display_transactions(workers=None):
+    if workers is not None and ledger is None and get_sqlite_connection() is None:
+        rebuild_ledger(workers)
+    results = run_query_batch([(name, args) for _, name, args in REPORT_QUERIES])
+    return dict(zip([key for key, _, _ in REPORT_QUERIES], results))
 
-
-    return output_data
-
-load_database_from_file()
-
-save_output_to_file(capture_display_transactions())
-###########################
-display_transactions()
+if __name__ == "__main__":
+    save_output_to_file(capture_display_transactions())
+    ###########################
+    display_transactions()
 # ------------------------------------------------------------------------------------------
 import tkinter as tk
 from tkinter import ttk, messagebox
@@ -2,14 +2,33 @@ import sys
 from tkinter import filedialog, messagebox
 import json
 import csv
-from typing import List, Dict, Union, Callable
+import glob
+import gzip
+import os
+import re
+import tempfile
+import time
+import unicodedata
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator, List, Dict, Tuple, Union, Callable
 sys.path.append(r"..\..\Concept_project\functional")
 
 # Import the necessary functions
-from financial_analysis import get_length
+from json_stream import iter_json_file
+from transaction_log import append_transactions, iter_transactions
+from sqlite_store import connect, is_sqlite_path, with_database, insert_transactions, iter_transaction_rows
+from money import cents_to_amount, is_valid_amount, to_cents
+from trans_budget import budget_totals, charge_budget_file, date_normalizer, parse_canonical_date, to_canonical_date, warn_limit_exceeded
+from dedup_index import iter_database_transactions, load_index, skip_duplicates
+from transaction_hashes import record_imported
+from columnar_file import COLUMNAR_EXTENSION, is_columnar_path, iter_columnar_file, write_columnar
 
 TRANSACTION_FIELDS = ["amount", "category", "type", "date"]
 DATABASE_FILE = r"F:\study\level 4\Concept\Concept_project (2)\Concept_project\functional\JSON\transactions.json"
+BUDGET_FILE = r"F:\study\level 4\Concept\Concept_project (2)\Concept_project\functional\JSON\budget_db.json"
 financial_file = r"F:\study\level 4\Concept\Concept_project (2)\Concept_project\functional\JSON\report2.json"
 
 def check_fields(fields: List[str], transaction: Dict[str, Union[str, float]]) -> bool:
@@ -22,134 +41,454 @@ def validate_transaction(transaction: Dict[str, Union[str, float]]) -> bool:
     try:
         return (
             check_fields(TRANSACTION_FIELDS, transaction) and
-            isinstance(float(transaction["amount"]), float) and
+            is_valid_amount(transaction["amount"]) and
             transaction["type"] in {"Income", "Expense"} and
             isinstance(transaction["category"], str) and
             isinstance(transaction["date"], str)
         )
-    except (ValueError, KeyError):
+    except (ValueError, KeyError, TypeError):
         return False
 
+# the transaction with its amount as a number of whole cents, CSV amounts are read as text
+def with_exact_amount(transaction: Dict[str, Union[str, float]]) -> Dict[str, Union[str, float]]:
+    return {**transaction, "amount": cents_to_amount(to_cents(transaction["amount"]))}
+
 def load_database(file_path: str) -> List[Dict[str, Union[str, float]]]:
+    if is_sqlite_path(file_path):
+        return with_database(file_path, lambda connection: list(iter_transaction_rows(connection)))
     try:
-        with open(file_path, "r") as f:
-            return json.load(f)
+        return list(iter_transactions(file_path))
     except FileNotFoundError:
         return []
 
-def save_database(data: List[Dict[str, Union[str, float]]], file_path: str) -> None:
+def save_database(data: Union[List[Dict[str, Union[str, float]]], Dict[str, Any]], file_path: str) -> None:
     with open(file_path, "w") as f:
         json.dump(data, f, indent=4)
 
 import json
 from typing import Callable, List, Dict, Union
 
-def import_from_json(
-    file_path: str,
-    validate: Callable,
-    index: int = 0,
-    data: List[Dict[str, Union[str, float]]] = None
-) -> List[Dict[str, Union[str, float]]]:
-    if data is None:
-        data = []
-
-    with open(file_path, "r") as f:
-        json_data = json.load(f)
-
-    if index < get_length(json_data):
-        entry = json_data[index]
-        if validate(entry):
-            return import_from_json(file_path, validate, index + 1, data + [entry])
-        return import_from_json(file_path, validate, index + 1, data)
-    
-    return data
-
-
-
+# records of an imported file that were added, rejected as invalid and skipped as already in the ledger,
+# the seconds it took and the (category, limit, spent) of the budgets its expenses took over their limit
+ImportSummary = namedtuple("ImportSummary", ["file_path", "accepted", "rejected", "duplicates", "seconds", "over_budget"],
+                           defaults=[()])
+
+# records validated at a time
+IMPORT_CHUNK_SIZE = 10000
+
+def rows_per_second(summary: ImportSummary) -> float:
+    rows = summary.accepted + summary.rejected + summary.duplicates
+    return rows / summary.seconds if summary.seconds > 0 else float(rows)
+
+def format_summary(summary: ImportSummary) -> str:
+    return (f"{summary.file_path}: {summary.accepted} accepted, {summary.rejected} rejected, "
+            f"{summary.duplicates} duplicates skipped "
+            f"in {summary.seconds:.2f}s ({rows_per_second(summary):.0f} rows/s)")
+
+# validate records a chunk at a time, yields the accepted transactions of each chunk and its number of rejected records
+def iter_validated_chunks(
+    records: Iterable[Any], validate: Callable, chunk_size: int = IMPORT_CHUNK_SIZE
+) -> Iterator[Tuple[List[Dict[str, Union[str, float]]], int]]:
+    records = iter(records)
+    chunk = list(islice(records, chunk_size))
+    while chunk:
+        valid = [with_exact_amount(record) for record in chunk if validate(record)]
+        yield valid, len(chunk) - len(valid)
+        chunk = list(islice(records, chunk_size))
+
+# validate records, returns the accepted transactions and the number of rejected records
+def validate_records(records: Iterable[Any], validate: Callable) -> Tuple[List[Dict[str, Union[str, float]]], int]:
+    accepted, rejected = [], 0
+    for valid, chunk_rejected in iter_validated_chunks(records, validate):
+        accepted.extend(valid)
+        rejected += chunk_rejected
+    return accepted, rejected
+
+# the valid records of a JSON array file, parsed once as a stream
+def import_from_json(file_path: str, validate: Callable) -> List[Dict[str, Union[str, float]]]:
+    return validate_records(iter_json_file(file_path), validate)[0]
+
+
+
+# how to read a bank's CSV export: the CSV header of each transaction field (matched ignoring case, a missing
+# type column means the sign of the amount gives the type), the delimiter (None to detect it), the text encoding
+# and the decimal separator of the amounts
+CsvFormat = namedtuple("CsvFormat", ["columns", "delimiter", "encoding", "decimal"])
+
+DEFAULT_CSV_FORMAT = CsvFormat({field: field for field in TRANSACTION_FIELDS}, None, "utf-8-sig", ".")
+
+# delimiters tried when detecting the one of a CSV file
+CSV_DELIMITERS = ",;\t|"
+
+# characters read to detect the delimiter
+CSV_SAMPLE_SIZE = 1 << 16
+
+# a signed amount per decimal separator: digits or groups of three digits separated by the other mark,
+# then the optional decimals
+AMOUNT_PATTERNS = {
+    ".": re.compile(r"([+-]?)(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?"),
+    ",": re.compile(r"([+-]?)(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d+))?"),
+}
+
+TRANSACTION_TYPES = {"income": "Income", "expense": "Expense", "credit": "Income", "debit": "Expense"}
+
+def is_currency_char(char: str) -> bool:
+    return char.isalpha() or unicodedata.category(char) == "Sc"
+
+# the amount of a CSV cell as a plain decimal string, without spaces, currency and thousands separators;
+# "" when the cell is not a number written with the decimal separator of the format. A currency symbol or code
+# is only accepted before or after the number, so "1e5" is rejected instead of becoming 15, and a thousands
+# separator only between complete groups of three digits, so "-5,00" or "1,5" read with "." as decimal
+# separator are rejected instead of becoming -500 or 15.
+def clean_amount(text: str, decimal: str) -> str:
+    thousands = "," if decimal == "." else "."
+    cleaned = "".join(char for char in text if not char.isspace())
+    sign = cleaned[:1] if cleaned[:1] in ("+", "-") else ""
+    start, end = len(sign), len(cleaned)
+    while start < end and is_currency_char(cleaned[start]):
+        start += 1
+    while end > start and is_currency_char(cleaned[end - 1]):
+        end -= 1
+    cleaned = sign + cleaned[start:end]
+    pattern = AMOUNT_PATTERNS.get(decimal)
+    match = pattern.fullmatch(cleaned) if pattern else None
+    if match is None:
+        return ""
+    sign, units, fraction = match.groups()
+    return f"{sign or ''}{units.replace(thousands, '')}{'.' + fraction if fraction else ''}"
+
+# build the function turning a CSV row (a list of cells) into a transaction with typed values,
+# from the header line and the format of the file
+def csv_row_reader(header: List[str], csv_format: CsvFormat) -> Callable[[List[str]], Dict[str, Union[str, float]]]:
+    positions = {name.strip().lower(): position for position, name in enumerate(header)}
+    columns = {field: positions.get(str(name).strip().lower()) for field, name in csv_format.columns.items()}
+    missing = [csv_format.columns[field] for field in TRANSACTION_FIELDS if field != "type" and columns.get(field) is None]
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(map(str, missing))}.")
+    type_position = columns.get("type")
+
+    def read_row(row: List[str]) -> Dict[str, Union[str, float]]:
+        if len(row) < len(header):
+            return {}
+        amount = clean_amount(row[columns["amount"]], csv_format.decimal)
+        # without a type column the sign gives the type, with one the type gives the direction and the
+        # amount is taken as it is without its sign, banks write expenses either way
+        if type_position is None:
+            type = "Expense" if amount.startswith("-") else "Income"
+        else:
+            type = TRANSACTION_TYPES.get(row[type_position].strip().lower(), row[type_position])
+        amount = amount.lstrip("+-")
+        return {"amount": amount, "category": row[columns["category"]].strip(), "type": type,
+                "date": row[columns["date"]].strip()}
+
+    return read_row
+
+# the rows of a CSV file as transactions, read once as a stream with their amount, type and date coerced a chunk
+# at a time; dates are canonical YYYY-MM-DD when they parse, the layout is detected on the first chunk
+def iter_csv_records(
+    file_path: str, csv_format: CsvFormat = DEFAULT_CSV_FORMAT, chunk_size: int = IMPORT_CHUNK_SIZE
+) -> Iterator[Dict[str, Union[str, float]]]:
+    with open(file_path, "r", encoding=csv_format.encoding, newline="") as f:
+        delimiter = csv_format.delimiter
+        if delimiter is None:
+            sample = f.read(CSV_SAMPLE_SIZE)
+            f.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, CSV_DELIMITERS).delimiter
+            except csv.Error:
+                delimiter = ","
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        read_row = csv_row_reader(header, csv_format)
+        normalize = None
+        chunk = [read_row(row) for row in islice(reader, chunk_size)]
+        while chunk:
+            if normalize is None:
+                normalize = date_normalizer(chunk)
+            yield from map(normalize, chunk)
+            chunk = [read_row(row) for row in islice(reader, chunk_size)]
+
+# the valid rows of a CSV file
 def import_from_csv(
-    file_path: str,
-    validate: Callable,
-    index: int = 0,
-    data: List[Dict[str, Union[str, float]]] = None
+    file_path: str, validate: Callable, csv_format: CsvFormat = DEFAULT_CSV_FORMAT
 ) -> List[Dict[str, Union[str, float]]]:
-    if data is None:
-        data = []
-
-    with open(file_path, "r") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-
-    if index < get_length(rows):
-        row = rows[index]
-        if validate(row):
-            return import_from_csv(file_path, validate, index + 1, data + [row])
-        return import_from_csv(file_path, validate, index + 1, data)            
-
-    return data
-
-
-
-def import_transactions():
+    return validate_records(iter_csv_records(file_path, csv_format), validate)[0]
+
+
+# the records of an export file to import
+def iter_import_records(file_path: str, csv_format: CsvFormat = DEFAULT_CSV_FORMAT) -> Iterator[Any]:
+    if file_path.endswith(".json"):
+        return iter_json_file(file_path)
+    if file_path.endswith(".csv"):
+        return iter_csv_records(file_path, csv_format)
+    if is_columnar_path(file_path):
+        return iter_columnar_file(file_path)
+    raise ValueError("Unsupported file format.")
+
+# add transactions to a database in one write, a JSON ledger gets them appended to its log
+def save_imported(database_file: str, transactions: Iterable[Dict[str, Union[str, float]]]) -> None:
+    if is_sqlite_path(database_file):
+        with_database(database_file, insert_transactions, transactions)
+    else:
+        append_transactions(database_file, transactions)
+
+# import the valid records of a file into a database, returns the summary and the imported transactions.
+# The records stream from the file into the database; with keep=False the imported transactions are not
+# collected and memory stays bounded by one chunk whatever the size of the file. With dedupe, records already
+# in the database are skipped using its hash index (see dedup_index). With a budget file, the imported expenses
+# are charged to its budgets in one write once the transactions are saved.
+def import_file(
+    file_path: str, database_file: str = DATABASE_FILE, validate: Callable = validate_transaction,
+    csv_format: CsvFormat = DEFAULT_CSV_FORMAT, keep: bool = True, dedupe: bool = True, budget_file: str = None
+) -> Tuple[ImportSummary, List[Dict[str, Union[str, float]]]]:
+    start = time.perf_counter()
+    kept, digests, counts, totals = [], [], {"accepted": 0, "rejected": 0, "duplicates": 0}, {}
+    index = load_index(database_file) if dedupe else None
+    matched = Counter()
+
+    def accepted_transactions():
+        for valid, rejected in iter_validated_chunks(iter_import_records(file_path, csv_format), validate):
+            if index is not None:
+                valid, chunk_digests, duplicates = skip_duplicates(index, valid, matched)
+                digests.extend(chunk_digests)
+                counts["duplicates"] += duplicates
+            counts["accepted"] += len(valid)
+            counts["rejected"] += rejected
+            if keep:
+                kept.extend(valid)
+            if budget_file is not None:
+                budget_totals(valid, totals)
+            yield from valid
+
+    save_imported(database_file, accepted_transactions())
+    if index is not None:
+        record_imported(database_file, digests)
+    over_budget = charge_budget_file(budget_file, totals) if budget_file is not None else []
+    summary = ImportSummary(file_path, counts["accepted"], counts["rejected"], counts["duplicates"],
+                            time.perf_counter() - start, over_budget)
+    return summary, kept
+
+
+# read and validate an export file without saving it, returns its summary and its valid transactions;
+# runs in the worker processes of bulk_import
+def read_export_file(
+    file_path: str, validate: Callable = validate_transaction, csv_format: CsvFormat = DEFAULT_CSV_FORMAT
+) -> Tuple[ImportSummary, List[Dict[str, Union[str, float]]]]:
+    start = time.perf_counter()
+    try:
+        accepted, rejected = validate_records(iter_import_records(file_path, csv_format), validate)
+    except (OSError, ValueError, UnicodeDecodeError, csv.Error) as error:
+        raise ValueError(f"{file_path}: {error}") from error
+    return ImportSummary(file_path, len(accepted), rejected, 0, time.perf_counter() - start), accepted
+
+# the export files named by directories (their .json, .csv and .col files), glob patterns or paths, in a stable order
+def expand_import_paths(sources: Iterable[str]) -> List[str]:
+    def expand(source):
+        if os.path.isdir(source):
+            return sorted(os.path.join(source, name) for name in os.listdir(source)
+                          if name.endswith((".json", ".csv", COLUMNAR_EXTENSION)) and os.path.isfile(os.path.join(source, name)))
+        if glob.has_magic(source):
+            return sorted(glob.glob(source))
+        return [source]
+    return list(dict.fromkeys(chain.from_iterable(map(expand, sources))))
+
+# import many export files at once: with workers > 1 they are parsed and validated by a process pool, then
+# every accepted transaction is added to the database in a single write, in the order of the files. Nothing is
+# saved if a file cannot be read. With dedupe, records already in the database or in an earlier file are
+# skipped. With a budget file, the expenses of every file are charged to its budgets in one write. Returns the
+# summary of each file and the total, whose time includes the writes.
+def bulk_import(
+    sources: Iterable[str], database_file: str = DATABASE_FILE, workers: int = None,
+    validate: Callable = validate_transaction, csv_format: CsvFormat = DEFAULT_CSV_FORMAT, dedupe: bool = True,
+    budget_file: str = None
+) -> Tuple[List[ImportSummary], ImportSummary]:
+    start = time.perf_counter()
+    file_paths = expand_import_paths(sources)
+    read = partial(read_export_file, validate=validate, csv_format=csv_format)
+    if workers is None or workers <= 1 or len(file_paths) <= 1:
+        results = list(map(read, file_paths))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(read, file_paths))
+
+    digests = []
+    if dedupe:
+        index = load_index(database_file)
+        deduplicated = []
+        for summary, accepted in results:
+            fresh, fresh_digests, duplicates = skip_duplicates(index, accepted, Counter())
+            deduplicated.append((summary._replace(accepted=len(fresh), duplicates=duplicates), fresh))
+            digests.extend(fresh_digests)
+            # the rows of this file are duplicates for the files after it
+            index.update(fresh_digests)
+        results = deduplicated
+
+    summaries = [summary for summary, _ in results]
+    save_imported(database_file, chain.from_iterable(accepted for _, accepted in results))
+    if dedupe:
+        record_imported(database_file, digests)
+    over_budget = []
+    if budget_file is not None:
+        totals = {}
+        for _, accepted in results:
+            budget_totals(accepted, totals)
+        over_budget = charge_budget_file(budget_file, totals)
+    total = ImportSummary(f"{len(summaries)} files", *(sum(getattr(summary, field) for summary in summaries)
+                                                      for field in ("accepted", "rejected", "duplicates")),
+                          time.perf_counter() - start, over_budget)
+    return summaries, total
+
+
+
+def import_transactions(on_imported: Callable = None):
     file_path = filedialog.askopenfilename(
-        filetypes=[("JSON Files", "*.json"), ("CSV Files", "*.csv")]
+        filetypes=[("JSON Files", "*.json"), ("CSV Files", "*.csv"), ("Columnar Files", "*.col")]
     )
     if not file_path:
         return
 
     try:
-        if file_path.endswith(".json"):
-            imported_transactions = import_from_json(file_path, validate_transaction)
-        elif file_path.endswith(".csv"):
-            imported_transactions = import_from_csv(file_path, validate_transaction)
-        else:
-            raise ValueError("Unsupported file format.")
-
-        current_transactions = load_database(DATABASE_FILE)
-        updated_transactions = current_transactions + imported_transactions
-        save_database(updated_transactions, DATABASE_FILE)
-
-        messagebox.showinfo("Import Success", f"Imported {get_length(imported_transactions)} transactions successfully.")
+        summary, imported_transactions = import_file(file_path, budget_file=BUDGET_FILE)
+        if on_imported is not None:
+            on_imported(imported_transactions)
+        for category, limit, spent in summary.over_budget:
+            warn_limit_exceeded(category, limit, spent)
+
+        messagebox.showinfo("Import Success", f"Imported {summary.accepted} transactions successfully, "
+                                              f"{summary.rejected} invalid records and {summary.duplicates} duplicates skipped.")
     except Exception as e:
         messagebox.showerror("Import Error", str(e))
 
+# transactions written at a time by the exporter
+EXPORT_CHUNK_SIZE = 10000
+
+EXPORT_FORMATS = (".csv", ".jsonl", ".json", COLUMNAR_EXTENSION)
+
+# the transactions of a database, only those of a category and within an inclusive range of dates when given
+# (in any supported format); the filters run in SQL for a SQLite database and skip whole blocks of a columnar file
+def iter_export_transactions(
+    database_file: str, start_date: str = None, end_date: str = None, category: str = None
+) -> Iterator[Dict[str, Union[str, float]]]:
+    start = parse_canonical_date(to_canonical_date(start_date)) if start_date else None
+    end = parse_canonical_date(to_canonical_date(end_date)) if end_date else None
+    if (start_date and start is None) or (end_date and end is None):
+        raise ValueError("Invalid date format. Please use one of the supported formats.")
+
+    if is_sqlite_path(database_file):
+        connection = connect(database_file)
+        try:
+            yield from iter_transaction_rows(connection, category, start and start.isoformat(), end and end.isoformat())
+        finally:
+            connection.close()
+        return
+    if is_columnar_path(database_file):
+        yield from iter_columnar_file(database_file, start, end, category)
+        return
+
+    for transaction in iter_database_transactions(database_file):
+        if category is not None and transaction["category"] != category:
+            continue
+        if start or end:
+            day = parse_canonical_date(transaction["date"]) if isinstance(transaction["date"], str) else None
+            if day is None or (start and day < start) or (end and day > end):
+                continue
+        yield transaction
+
+# open an export file for writing text, compressed with gzip if asked
+def open_export(file_path: str, compress: bool):
+    if compress:
+        return gzip.open(file_path, "wt", encoding="utf-8", newline="")
+    return open(file_path, "w", encoding="utf-8", newline="")
+
+# write transactions to an export file a chunk at a time, as CSV, JSON Lines or compact JSON depending on its
+# name, compressed with gzip when the name ends in .gz; a .col name writes a columnar file (see columnar_file),
+# whose blocks are already compressed. The file is written next to its destination and moved into place.
+# Returns the number of transactions written.
+def write_export(transactions: Iterable[Dict[str, Union[str, float]]], file_path: str) -> int:
+    compress = file_path.endswith(".gz")
+    name = file_path[:-len(".gz")] if compress else file_path
+    if not name.endswith(EXPORT_FORMATS):
+        raise ValueError("Unsupported file format.")
+    if is_columnar_path(name):
+        if compress:
+            raise ValueError("Columnar files are already compressed.")
+        return write_columnar(transactions, file_path)
+    transactions = iter(transactions)
+    chunks = iter(lambda: list(islice(transactions, EXPORT_CHUNK_SIZE)), [])
+
+    count = 0
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp")
+    os.close(descriptor)
+    try:
+        with open_export(temporary_path, compress) as f:
+            if name.endswith(".csv"):
+                writer = csv.DictWriter(f, fieldnames=TRANSACTION_FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                for chunk in chunks:
+                    writer.writerows(chunk)
+                    count += len(chunk)
+            elif name.endswith(".jsonl"):
+                for chunk in chunks:
+                    f.write("".join(json.dumps(transaction) + "\n" for transaction in chunk))
+                    count += len(chunk)
+            else:
+                f.write("[")
+                for chunk in chunks:
+                    f.write(("," if count else "") + ",".join(json.dumps(transaction, separators=(",", ":")) for transaction in chunk))
+                    count += len(chunk)
+                f.write("]")
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    return count
+
+# export the transactions of a database, filtered as in iter_export_transactions; returns how many were written
+def export_file(
+    database_file: str, file_path: str, start_date: str = None, end_date: str = None, category: str = None
+) -> int:
+    return write_export(iter_export_transactions(database_file, start_date, end_date, category), file_path)
+
 def export_transactions():
-    transactions = load_database(DATABASE_FILE)
-    if not transactions:
+    transactions = iter_export_transactions(DATABASE_FILE)
+    first = next(transactions, None)
+    if first is None:
         messagebox.showinfo("Export Error", "No transactions to export.")
         return
 
     file_path = filedialog.asksaveasfilename(
         defaultextension=".json",
-        filetypes=[("JSON Files", "*.json"), ("CSV Files", "*.csv")]
+        filetypes=[("JSON Files", "*.json"), ("CSV Files", "*.csv"), ("JSON Lines Files", "*.jsonl"),
+                   ("Columnar Files", "*.col"), ("Compressed JSON Files", "*.json.gz"),
+                   ("Compressed CSV Files", "*.csv.gz"), ("Compressed JSON Lines Files", "*.jsonl.gz")]
     )
     if not file_path:
         return
 
     try:
-        if file_path.endswith(".json"):
-            save_database(transactions, file_path)
-        elif file_path.endswith(".csv"):
-            with open(file_path, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=TRANSACTION_FIELDS)
-                writer.writeheader()
-
-                def write_transaction(index: int):
-                    if index < get_length(transactions):
-                        writer.writerow(transactions[index])
-                        write_transaction(index + 1)
-
-                write_transaction(0)
-        else:
-            raise ValueError("Unsupported file format.")
-
+        write_export(chain([first], transactions), file_path)
         messagebox.showinfo("Export Success", f"Exported transactions successfully to {file_path}.")
     except Exception as e:
         messagebox.showerror("Export Error", str(e))
 
+# the financial report written by financial_analysis.save_output_to_file, a JSON object; None if there is none
+def load_financial_report(file_path: str) -> Union[Dict[str, Any], None]:
+    try:
+        with open(file_path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
 def export_financial():
-    transactions = load_database(financial_file)
-    if not transactions:
-        messagebox.showinfo("Export Error", "No transactions to export.")
+    try:
+        report = load_financial_report(financial_file)
+    except (OSError, ValueError) as e:
+        messagebox.showerror("Export Error", str(e))
+        return
+    if not report:
+        messagebox.showinfo("Export Error", "No financial report to export.")
         return
 
     file_path = filedialog.asksaveasfilename(
@@ -160,22 +499,33 @@ def export_financial():
         return
 
     try:
-        if file_path.endswith(".json"):
-            save_database(transactions, file_path)
-        elif file_path.endswith(".csv"):
-            with open(file_path, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=TRANSACTION_FIELDS)
-                writer.writeheader()
-
-                def write_transaction(index: int):
-                    if index < get_length(transactions):
-                        writer.writerow(transactions[index])
-                        write_transaction(index + 1)
-
-                write_transaction(0)
-        else:
+        if not file_path.endswith(".json"):
             raise ValueError("Unsupported file format.")
-
+        save_database(report, file_path)
         messagebox.showinfo("Export Success", f"Exported financial file successfully to {file_path}.")
     except Exception as e:
         messagebox.showerror("Export Error", str(e))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] not in ("import", "bulk", "export"):
+        sys.exit("usage: python import_export.py import <ledger> <export.json|export.csv|export.col>...\n"
+                 "       python import_export.py bulk <ledger> <directory|glob|export>...\n"
+                 "       python import_export.py export <ledger> <file.csv|file.jsonl|file.json>[.gz]|<file.col> "
+                 "[--from DATE] [--to DATE] [--category NAME]")
+    if sys.argv[1] == "export":
+        options = dict(zip(sys.argv[4::2], sys.argv[5::2]))
+        try:
+            count = export_file(sys.argv[2], sys.argv[3], options.get("--from"), options.get("--to"), options.get("--category"))
+        except ValueError as error:
+            sys.exit(f"Nothing exported, {error}")
+        print(f"{count} transactions exported to {sys.argv[3]}")
+    elif sys.argv[1] == "import":
+        for source_file in sys.argv[3:]:
+            print(format_summary(import_file(source_file, sys.argv[2], keep=False)[0]))
+    else:
+        try:
+            summaries, total = bulk_import(sys.argv[3:], sys.argv[2], os.cpu_count())
+        except ValueError as error:
+            sys.exit(f"Nothing imported, {error}")
+        for summary in summaries + [total]:
+            print(format_summary(summary))
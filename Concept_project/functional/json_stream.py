@@ -0,0 +1,126 @@
+import json
+import os
+import re
+from typing import Any, Iterator, List, TextIO, Tuple
+
+# characters read from the file at a time
+CHUNK_SIZE = 1 << 16
+
+WHITESPACE = " \t\n\r"
+
+
+# yield the elements of a top-level JSON array one at a time, holding at most one element and one chunk in memory
+def iter_json_array(file: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+
+    # make sure the buffer holds something past position, returns False at the end of the file
+    def fill():
+        nonlocal buffer, position, eof
+        while position >= len(buffer) and not eof:
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+        return position < len(buffer)
+
+    def skip_whitespace():
+        nonlocal position
+        while fill() and buffer[position] in WHITESPACE:
+            position += 1
+
+    skip_whitespace()
+    if not fill():
+        return
+    if buffer[position] != "[":
+        raise ValueError("Expected a JSON array at the top level.")
+    position += 1
+
+    expect_element = True
+    while True:
+        skip_whitespace()
+        if not fill():
+            raise ValueError("Unexpected end of file inside the JSON array.")
+        if buffer[position] == "]":
+            return
+        if not expect_element:
+            if buffer[position] != ",":
+                raise ValueError(f"Expected ',' or ']' in the JSON array, found {buffer[position]!r}.")
+            position += 1
+            expect_element = True
+            continue
+
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+                # a number cut by the end of the chunk decodes too early, so only accept an element
+                # followed by a delimiter that is already in the buffer
+                if eof or (end < len(buffer) and buffer[end] in WHITESPACE + ",]"):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+        position = end
+        expect_element = False
+        yield element
+
+
+# yield the records of a JSON file holding a top-level array
+def iter_json_file(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    with open(file_path, "r") as file:
+        yield from iter_json_array(file, chunk_size)
+
+
+# bytes read at a time when looking for the boundary between two elements
+BOUNDARY_WINDOW = 1 << 16
+
+# the end of an object element followed by the start of the next one
+ELEMENT_BOUNDARY = re.compile(rb"\}\s*,\s*\{")
+
+
+# cut a file holding a top-level array of objects into at most parts byte ranges that each hold whole elements,
+# for parsing by several processes; [] if the file does not hold a JSON array
+def split_json_array(file_path: str, parts: int) -> List[Tuple[int, int]]:
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as file:
+        if file.read(BOUNDARY_WINDOW).lstrip()[:1] != b"[":
+            return []
+        boundaries = [0]
+        for part in range(1, parts):
+            position = max(size * part // parts, boundaries[-1] + 1)
+            file.seek(position)
+            window = b""
+            while True:
+                chunk = file.read(BOUNDARY_WINDOW)
+                window += chunk
+                match = ELEMENT_BOUNDARY.search(window)
+                if match or not chunk:
+                    break
+            if match is None:
+                break
+            boundaries.append(position + match.end() - 1)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+# the elements of one byte range given by split_json_array; raises ValueError if the range does not hold whole
+# elements, when a boundary was found inside a string or a nested object
+def load_json_array_range(file_path: str, start: int, end: int) -> List[Any]:
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        text = file.read(end - start).decode("utf-8").strip()
+        size = file.seek(0, os.SEEK_END)
+    if start == 0:
+        if not text.startswith("["):
+            raise ValueError("Expected a JSON array at the top level.")
+        text = text[1:]
+    if end == size:
+        if not text.endswith("]"):
+            raise ValueError("Unexpected end of file inside the JSON array.")
+        text = text[:-1]
+    else:
+        text = text.removesuffix(",")
+    return json.loads("[" + text + "]")
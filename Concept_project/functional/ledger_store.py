@@ -0,0 +1,443 @@
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+from itertools import accumulate, compress, islice, repeat
+from operator import and_, eq, ge, le
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from date_parser import SAMPLE_SIZE
+from json_stream import load_json_array_range, split_json_array
+from money import to_cents
+from trans_budget import date_normalizer, iter_data, parse_canonical_date, TransactionType
+from transaction_log import iter_log, iter_transactions, log_file_path
+
+# Columnar view of the transaction database: one parallel array per field.
+# amounts are int64 cents, days are date ordinals (0 = unparseable date), months are 1-12 (0 = unknown),
+# types and categories are small ints indexing into type_names / category_names.
+ColumnarStore = namedtuple(
+    "ColumnarStore",
+    ["amounts", "days", "months", "types", "categories", "type_names", "category_names", "type_codes", "category_codes"],
+)
+
+# Fields that group_totals can group by.
+GROUP_FIELDS = ("category", "type", "year", "month", "day")
+
+# Expense rows sorted by day with prefix sums of their amounts: totals[i] is the sum of the first i rows.
+DateIndex = namedtuple("DateIndex", ["days", "totals"])
+
+# Every aggregate kept over the loaded ledger. The date indexes are built at load and stay as they are,
+# later changes go into sparse Fenwick trees (index_deltas) keyed the same way; the other aggregates are
+# updated in place. category_rows counts the rows of each category, a category without rows no longer exists
+# although its code stays in the dictionaries of the store.
+LedgerAggregates = namedtuple(
+    "LedgerAggregates", ["store", "date_indexes", "index_deltas", "month_cube", "category_totals", "category_rows"]
+)
+
+# Aggregates of one month partition of the ledger, computed on their own (possibly in a worker process)
+# and merged in date order by merge_aggregates. The store rows are sorted by day.
+PartialAggregates = namedtuple("PartialAggregates", ["store", "month_cube", "category_totals"])
+
+# Number of positions of the Fenwick trees, enough for the ordinal of any date.
+FENWICK_SIZE = 1 << 22
+
+
+# return the code of value in the dictionary, adding it if it is new
+def encode_value(value: str, names: List[str], codes: Dict[str, int]) -> int:
+    code = codes.get(value)
+    if code is None:
+        code = len(names)
+        names.append(value)
+        codes[value] = code
+    return code
+
+
+# an empty store, optionally sharing the dictionaries of another store
+def empty_store(dictionaries: Optional[ColumnarStore] = None) -> ColumnarStore:
+    names = (dictionaries.type_names, dictionaries.category_names, dictionaries.type_codes, dictionaries.category_codes) \
+        if dictionaries else ([], [], {}, {})
+    return ColumnarStore(array("q"), array("i"), array("B"), array("B"), array("H"), *names)
+
+
+# append one transaction as a row of the store
+def append_row(store: ColumnarStore, transaction: Dict[str, Any]):
+    append_parsed_row(store, transaction, parse_canonical_date(transaction["date"]))
+
+
+# append one transaction whose date is already parsed
+def append_parsed_row(store: ColumnarStore, transaction: Dict[str, Any], parsed: Optional[date]):
+    store.amounts.append(to_cents(transaction["amount"]))
+    store.days.append(parsed.toordinal() if parsed else 0)
+    store.months.append(parsed.month if parsed else 0)
+    store.types.append(encode_value(transaction["type"], store.type_names, store.type_codes))
+    store.categories.append(encode_value(transaction["category"], store.category_names, store.category_codes))
+
+
+# build the columnar store once from the transaction dicts, which can be streamed
+def build_store(transactions: Iterable[Dict[str, Any]]) -> ColumnarStore:
+    store = empty_store()
+    for transaction in transactions or []:
+        append_row(store, transaction)
+    return store
+
+
+# check if category exists in the store
+def store_has_category(store: ColumnarStore, category: str) -> bool:
+    return category in store.category_codes
+
+
+# the position of the last row of the store holding the transaction, None if there is none
+def find_row(store: ColumnarStore, transaction: Dict[str, Any]) -> Optional[int]:
+    parsed = parse_canonical_date(transaction["date"])
+    day, cents = parsed.toordinal() if parsed else 0, to_cents(transaction["amount"])
+    type_code = store.type_codes.get(transaction["type"])
+    category_code = store.category_codes.get(transaction["category"])
+    if type_code is None or category_code is None:
+        return None
+    for row in range(len(store.days) - 1, -1, -1):
+        if store.days[row] == day and store.amounts[row] == cents and store.categories[row] == category_code \
+                and store.types[row] == type_code:
+            return row
+    return None
+
+
+# delete one row of the store
+def delete_row(store: ColumnarStore, row: int):
+    for column in (store.amounts, store.days, store.months, store.types, store.categories):
+        del column[row]
+
+
+# number of rows of each category of the store
+def count_category_rows(store: ColumnarStore) -> Dict[str, int]:
+    counts = Counter(store.categories)
+    return {name: counts[code] for code, name in enumerate(store.category_names) if counts[code]}
+
+
+# build a lazy mask of expense rows matching the filters; "" category, None bounds and month 0 mean "any"
+def expense_mask(store: ColumnarStore, category: str = "", start_day: Optional[int] = None,
+                 end_day: Optional[int] = None, month: int = 0):
+    mask = map(eq, store.types, repeat(store.type_codes[TransactionType["EXPENSE"]]))
+    if category != "":
+        mask = map(and_, mask, map(eq, store.categories, repeat(store.category_codes[category])))
+    if start_day is not None:
+        mask = map(and_, mask, map(ge, store.days, repeat(start_day)))
+    if end_day is not None:
+        mask = map(and_, mask, map(le, store.days, repeat(end_day)))
+    if month != 0:
+        mask = map(and_, mask, map(eq, store.months, repeat(month)))
+    return mask
+
+
+# sum expense amounts matching the filters
+def sum_expenses(store: ColumnarStore, category: str = "", start_day: Optional[int] = None,
+                 end_day: Optional[int] = None, month: int = 0) -> int:
+    if TransactionType["EXPENSE"] not in store.type_codes:
+        return 0
+    if category != "" and not store_has_category(store, category):
+        return 0
+    return sum(compress(store.amounts, expense_mask(store, category, start_day, end_day, month)))
+
+
+# build a date index over the given rows of the store
+def index_rows(store: ColumnarStore, rows: List[int]) -> DateIndex:
+    days = array("i", (store.days[row] for row in rows))
+    totals = array("q", accumulate((store.amounts[row] for row in rows), initial=0))
+    return DateIndex(days, totals)
+
+
+# build the date indexes of all expenses (key None) and of each category, with a single sort
+def build_date_indexes(store: ColumnarStore) -> Dict[Optional[str], DateIndex]:
+    if TransactionType["EXPENSE"] not in store.type_codes:
+        return {None: DateIndex(array("i"), array("q", [0]))}
+
+    rows = sorted(compress(range(len(store.days)), expense_mask(store)), key=store.days.__getitem__)
+    category_rows = {}
+    for row in rows:
+        category_rows.setdefault(store.category_names[store.categories[row]], []).append(row)
+
+    indexes = {None: index_rows(store, rows)}
+    indexes.update((category, index_rows(store, rows)) for category, rows in category_rows.items())
+    return indexes
+
+
+# sum the expenses between two days (inclusive) with two bisects; None bounds mean open ended
+def range_total(index: DateIndex, start_day: Optional[int] = None, end_day: Optional[int] = None) -> int:
+    low = 0 if start_day is None else bisect_left(index.days, start_day)
+    high = len(index.days) if end_day is None else bisect_right(index.days, end_day)
+    if high <= low:
+        return 0
+    return index.totals[high] - index.totals[low]
+
+
+# sum the expenses of a category ("" means any) between two days using the date indexes
+def indexed_expenses(indexes: Dict[Optional[str], DateIndex], category: str = "",
+                     start_day: Optional[int] = None, end_day: Optional[int] = None) -> int:
+    index = indexes.get(None if category == "" else category)
+    if index is None:
+        return 0
+    return range_total(index, start_day, end_day)
+
+
+# per-row values of a group field, dates are decoded once per distinct day (0 for unparseable dates)
+def group_column(store: ColumnarStore, field: str, dates: Dict[int, date]) -> Iterable:
+    if field == "category":
+        return map(store.category_names.__getitem__, store.categories)
+    if field == "type":
+        return map(store.type_names.__getitem__, store.types)
+    if field == "year":
+        return (dates[day].year if day else 0 for day in store.days)
+    if field == "month":
+        return store.months
+    if field == "day":
+        return (dates[day].day if day else 0 for day in store.days)
+    raise ValueError(f"Cannot group by {field!r}, expected one of {', '.join(GROUP_FIELDS)}.")
+
+
+# total the amounts grouped by any combination of GROUP_FIELDS in a single pass over the store;
+# keys are tuples of the field values in the order of by, type_name restricts the rows to one type
+def group_totals(store: ColumnarStore, by: Sequence[str], type_name: Optional[str] = None) -> Dict[Tuple, int]:
+    dates = {}
+    if "year" in by or "day" in by:
+        dates = {day: date.fromordinal(day) for day in set(store.days) if day}
+    rows = zip(zip(*(group_column(store, field, dates) for field in by)), store.amounts)
+
+    if type_name is not None:
+        if type_name not in store.type_codes:
+            return {}
+        rows = compress(rows, map(eq, store.types, repeat(store.type_codes[type_name])))
+
+    totals = {}
+    for key, amount in rows:
+        totals[key] = totals.get(key, 0) + amount
+    return totals
+
+
+# materialize the (category, year, month) -> expense total cube; category "" holds every category of the month
+def build_month_cube(store: ColumnarStore) -> Dict[Tuple[str, int, int], int]:
+    cube = group_totals(store, ("category", "year", "month"), TransactionType["EXPENSE"])
+    month_totals = {}
+    for (category, year, month), total in cube.items():
+        month_totals[year, month] = month_totals.get((year, month), 0) + total
+    cube.update((("", year, month), total) for (year, month), total in month_totals.items())
+    return cube
+
+
+# expense total of a category ("" means any) in a month, read from the cube
+def month_total(cube: Dict[Tuple[str, int, int], int], category: str, year: int, month: int) -> int:
+    return cube.get((category, year, month), 0)
+
+
+# add amount at a day of a sparse Fenwick tree, touching O(log FENWICK_SIZE) nodes
+def fenwick_add(tree: Dict[int, int], day: int, amount: int):
+    position = day + 1
+    while position <= FENWICK_SIZE:
+        tree[position] = tree.get(position, 0) + amount
+        position += position & -position
+
+
+# sum of the amounts of a sparse Fenwick tree up to a day (inclusive)
+def fenwick_prefix(tree: Dict[int, int], day: int) -> int:
+    position = min(day + 1, FENWICK_SIZE)
+    total = 0
+    while position > 0:
+        total += tree.get(position, 0)
+        position -= position & -position
+    return total
+
+
+# sum of the amounts of a sparse Fenwick tree between two days (inclusive); None bounds mean open ended
+def fenwick_range(tree: Dict[int, int], start_day: Optional[int] = None, end_day: Optional[int] = None) -> int:
+    if not tree:
+        return 0
+    high = fenwick_prefix(tree, FENWICK_SIZE if end_day is None else end_day)
+    low = 0 if start_day is None or start_day <= 0 else fenwick_prefix(tree, start_day - 1)
+    return high - low
+
+
+# expense totals of every category
+def build_category_totals(store: ColumnarStore) -> Dict[str, int]:
+    return {category: total for (category,), total in group_totals(store, ("category",), TransactionType["EXPENSE"]).items()}
+
+
+# stream the transactions into one store per calendar month, keyed by (year, month) and (0, 0) for the dates
+# that do not parse; the stores share their dictionaries, so codes and names follow the order of first
+# appearance in the transactions
+def month_partitions(transactions: Iterable[Dict[str, Any]]) -> Dict[Tuple[int, int], ColumnarStore]:
+    dictionaries = empty_store()
+    stores = {}
+    for transaction in transactions or []:
+        parsed = parse_canonical_date(transaction["date"])
+        month = (parsed.year, parsed.month) if parsed else (0, 0)
+        store = stores.get(month)
+        if store is None:
+            store = stores[month] = empty_store(dictionaries)
+        append_parsed_row(store, transaction, parsed)
+    return stores
+
+
+# the month partitions of the transactions in date order
+def partition_by_month(transactions: Iterable[Dict[str, Any]]) -> List[ColumnarStore]:
+    stores = month_partitions(transactions)
+    return [stores[month] for month in sorted(stores)]
+
+
+# append the rows of a store to another, recoding its types and categories into the dictionaries of the other
+def extend_store(store: ColumnarStore, part: ColumnarStore):
+    type_map = [encode_value(name, store.type_names, store.type_codes) for name in part.type_names]
+    category_map = [encode_value(name, store.category_names, store.category_codes) for name in part.category_names]
+    store.amounts.extend(part.amounts)
+    store.days.extend(part.days)
+    store.months.extend(part.months)
+    store.types.extend(map(type_map.__getitem__, part.types))
+    store.categories.extend(map(category_map.__getitem__, part.categories))
+
+
+# merge the month partitions of consecutive parts of a ledger, given in ledger order, into one store per month
+# in date order; the stores share their dictionaries as those of partition_by_month over the whole ledger
+def merge_month_partitions(parts: Iterable[Dict[Tuple[int, int], ColumnarStore]]) -> List[ColumnarStore]:
+    dictionaries = empty_store()
+    stores = {}
+    for part in parts:
+        for month, part_store in part.items():
+            store = stores.get(month)
+            if store is None:
+                store = stores[month] = empty_store(dictionaries)
+            extend_store(store, part_store)
+    return [stores[month] for month in sorted(stores)]
+
+
+# copy the given rows of a store into a new store with the same dictionaries
+def take_rows(store: ColumnarStore, rows: List[int]) -> ColumnarStore:
+    def take(column):
+        return array(column.typecode, (column[row] for row in rows))
+    return store._replace(amounts=take(store.amounts), days=take(store.days), months=take(store.months),
+                          types=take(store.types), categories=take(store.categories))
+
+
+# aggregates of the store of one month partition
+def partition_aggregates(store: ColumnarStore) -> PartialAggregates:
+    by_day = take_rows(store, sorted(range(len(store.days)), key=store.days.__getitem__))
+    return PartialAggregates(by_day, build_month_cube(store), build_category_totals(store))
+
+
+# merge month partials, given in date order, into the aggregates of the whole ledger;
+# the dictionaries are seeded with the names in order of first appearance in the ledger
+def merge_aggregates(partials: Iterable[PartialAggregates], type_names: List[str], category_names: List[str]) -> LedgerAggregates:
+    store = empty_store()
+    for name in type_names:
+        encode_value(name, store.type_names, store.type_codes)
+    for name in category_names:
+        encode_value(name, store.category_names, store.category_codes)
+
+    month_cube, category_totals = {}, {}
+    for partial in partials:
+        extend_store(store, partial.store)
+        month_cube.update(partial.month_cube)
+        for category, total in partial.category_totals.items():
+            category_totals[category] = category_totals.get(category, 0) + total
+
+    return LedgerAggregates(store, build_date_indexes(store), {}, month_cube, category_totals, count_category_rows(store))
+
+
+# build every aggregate once from the transaction dicts, which can be streamed: each row goes straight into
+# the store of its calendar month. The month partitions are aggregated on their own and merged in date order;
+# with workers > 1 they are aggregated by a process pool. The partitions do not depend on the number of workers,
+# so the result is the same either way.
+def build_aggregates(transactions: Iterable[Dict[str, Any]], workers: Optional[int] = None) -> LedgerAggregates:
+    return aggregate_partitions(partition_by_month(transactions), workers)
+
+
+# aggregate month partitions given in date order and sharing their dictionaries, with workers > 1 in a process pool
+def aggregate_partitions(partitions: List[ColumnarStore], workers: Optional[int] = None) -> LedgerAggregates:
+    type_names = partitions[0].type_names if partitions else []
+    category_names = partitions[0].category_names if partitions else []
+
+    if workers is None or workers <= 1 or len(partitions) <= 1:
+        return merge_aggregates(map(partition_aggregates, partitions), type_names, category_names)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(partitions) // (workers * 4))
+        return merge_aggregates(pool.map(partition_aggregates, partitions, chunksize=chunksize), type_names, category_names)
+
+
+# the month partitions of one byte range of a JSON array ledger (see json_stream.split_json_array), with the dates
+# rewritten by the normalizer of the sample records of the whole ledger; runs in the worker processes
+def parse_range_partitions(file_path: str, byte_range: Tuple[int, int], sample: List[Any]) -> Dict[Tuple[int, int], ColumnarStore]:
+    return month_partitions(map(date_normalizer(sample), load_json_array_range(file_path, *byte_range)))
+
+
+# build the aggregates of a ledger file and its log as build_aggregates over iter_data, with a JSON array file cut
+# into byte ranges parsed by workers processes, so that decoding the records and their dates runs in parallel
+# too. Other files, and arrays that cannot be cut at the boundaries of their elements, are streamed.
+def build_file_aggregates(file_path: str, workers: Optional[int] = None) -> LedgerAggregates:
+    parts = None
+    if workers is not None and workers > 1 and log_file_path(file_path) != file_path and os.path.exists(file_path):
+        sample = list(islice(iter_transactions(file_path), SAMPLE_SIZE))
+        ranges = split_json_array(file_path, workers)
+        if len(ranges) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    parts = list(pool.map(partial(parse_range_partitions, file_path, sample=sample), ranges))
+            except ValueError:
+                parts = None
+    if parts is None:
+        return build_aggregates(iter_data(file_path), workers)
+    parts.append(month_partitions(map(date_normalizer(sample), iter_log(log_file_path(file_path)))))
+    return aggregate_partitions(merge_month_partitions(parts), workers)
+
+
+# apply one added (sign 1) or removed (sign -1) transaction of a day to every aggregate but the store, in O(log N)
+def apply_to_aggregates(aggregates: LedgerAggregates, transaction: Dict[str, Any], day: int, sign: int = 1):
+    category = transaction["category"]
+    if transaction["type"] == TransactionType["EXPENSE"]:
+        amount = sign * to_cents(transaction["amount"])
+        fenwick_add(aggregates.index_deltas.setdefault(None, {}), day, amount)
+        fenwick_add(aggregates.index_deltas.setdefault(category, {}), day, amount)
+
+        parsed = date.fromordinal(day) if day else None
+        year, month = (parsed.year, parsed.month) if parsed else (0, 0)
+        cube = aggregates.month_cube
+        cube[category, year, month] = cube.get((category, year, month), 0) + amount
+        if category != "":
+            cube["", year, month] = cube.get(("", year, month), 0) + amount
+        aggregates.category_totals[category] = aggregates.category_totals.get(category, 0) + amount
+
+    # a category whose last row is removed is dropped as if the ledger was loaded again
+    rows = aggregates.category_rows.get(category, 0) + sign
+    if rows:
+        aggregates.category_rows[category] = rows
+    else:
+        del aggregates.category_rows[category]
+        aggregates.category_totals.pop(category, None)
+
+
+# add a transaction to the aggregates, its row is appended to the store
+def add_to_aggregates(aggregates: LedgerAggregates, transaction: Dict[str, Any]):
+    append_row(aggregates.store, transaction)
+    apply_to_aggregates(aggregates, transaction, aggregates.store.days[-1], 1)
+
+
+# remove a transaction from the aggregates, its last row is deleted from the store;
+# raises ValueError if the store does not hold it
+def remove_from_aggregates(aggregates: LedgerAggregates, transaction: Dict[str, Any]):
+    row = find_row(aggregates.store, transaction)
+    if row is None:
+        raise ValueError("The transaction is not in the ledger.")
+    day = aggregates.store.days[row]
+    delete_row(aggregates.store, row)
+    apply_to_aggregates(aggregates, transaction, day, -1)
+
+
+# whether the ledger has rows of a category
+def has_category_rows(aggregates: LedgerAggregates, category: str) -> bool:
+    return aggregates.category_rows.get(category, 0) > 0
+
+
+# expense total of a category ("" means any) between two days, from the date index plus the later changes
+def aggregate_range_total(aggregates: LedgerAggregates, category: str = "",
+                          start_day: Optional[int] = None, end_day: Optional[int] = None) -> int:
+    key = None if category == "" else category
+    return (indexed_expenses(aggregates.date_indexes, category, start_day, end_day)
+            + fenwick_range(aggregates.index_deltas.get(key, {}), start_day, end_day))
@@ -0,0 +1,52 @@
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from typing import Any
+
+# Amounts are integer cents from import through storage and aggregation, sums of cents are exact.
+# They become decimals again only for display (format_cents) and at the public API (cents_to_amount).
+CENTS_PER_UNIT = 100
+
+
+# integer cents of an amount given as an int, a float, a Decimal or a numeric string, rounded to the nearest cent;
+# raises ValueError for anything else and for infinite or NaN amounts
+def to_cents(amount: Any) -> int:
+    if isinstance(amount, bool):
+        raise ValueError(f"Invalid amount: {amount!r}")
+    if isinstance(amount, int):
+        return amount * CENTS_PER_UNIT
+    if isinstance(amount, float):
+        try:
+            # the float nearest to a two-decimal amount is within far less than half a cent of it
+            return round(amount * CENTS_PER_UNIT)
+        except (OverflowError, ValueError):
+            raise ValueError(f"Invalid amount: {amount!r}") from None
+    try:
+        value = Decimal(amount.strip() if isinstance(amount, str) else amount)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f"Invalid amount: {amount!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount: {amount!r}")
+    return int((value * CENTS_PER_UNIT).to_integral_value(ROUND_HALF_EVEN))
+
+
+# check that an amount is a finite number with at most two decimals, so that to_cents does not round it
+def is_valid_amount(amount: Any) -> bool:
+    try:
+        cents = to_cents(amount)
+    except ValueError:
+        return False
+    if isinstance(amount, float):
+        return cents / CENTS_PER_UNIT == amount
+    if isinstance(amount, (str, Decimal)):
+        return Decimal(cents) / CENTS_PER_UNIT == Decimal(amount.strip() if isinstance(amount, str) else amount)
+    return True
+
+
+# the amount of a number of cents, as stored in the JSON files
+def cents_to_amount(cents: int) -> float:
+    return cents / CENTS_PER_UNIT
+
+
+# exact decimal text of a number of cents, "3010.00"
+def format_cents(cents: int) -> str:
+    units, rest = divmod(abs(cents), CENTS_PER_UNIT)
+    return f"{'-' if cents < 0 else ''}{units}.{rest:02d}"
@@ -0,0 +1,64 @@
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable
+
+# Snapshot of a query cache's counters.
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "size", "max_size", "version"])
+
+
+def create_query_cache(max_size: int = 1024) -> Dict[str, Any]:
+    return {"entries": OrderedDict(), "hits": 0, "misses": 0, "max_size": max_size, "version": None}
+
+
+# turn the arguments of a query into a hashable key, lists become tuples
+def normalize_args(args: Any) -> Hashable:
+    if isinstance(args, (list, tuple)):
+        return tuple(normalize_args(arg) for arg in args)
+    if isinstance(args, dict):
+        return tuple(sorted((key, normalize_args(value)) for key, value in args.items()))
+    return args
+
+
+# return the cached result of a query or compute and store it, evicting the least recently used entry when full;
+# entries of an older ledger version are dropped as soon as the version changes
+def cache_lookup(cache: Dict[str, Any], kind: str, args: Any, version: Hashable, compute: Callable[[], Any]) -> Any:
+    entries = cache["entries"]
+    if cache["version"] != version:
+        entries.clear()
+        cache["version"] = version
+
+    key = (kind, normalize_args(args), version)
+    if key in entries:
+        entries.move_to_end(key)
+        cache["hits"] += 1
+        return entries[key]
+
+    cache["misses"] += 1
+    value = compute()
+    entries[key] = value
+    if len(entries) > cache["max_size"]:
+        entries.popitem(last=False)
+    return value
+
+
+def cache_info(cache: Dict[str, Any]) -> CacheInfo:
+    return CacheInfo(cache["hits"], cache["misses"], len(cache["entries"]), cache["max_size"], cache["version"])
+
+
+def cache_clear(cache: Dict[str, Any]):
+    cache["entries"].clear()
+    cache["hits"] = cache["misses"] = 0
+
+
+# decorator caching a query function in cache under the ledger version returned by version_of;
+# list and dict results are copied so callers cannot change the cached value
+def cached_query(cache: Dict[str, Any], version_of: Callable[[], Hashable]):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            value = cache_lookup(cache, func.__name__, (args, kwargs), version_of(), lambda: func(*args, **kwargs))
+            if isinstance(value, (list, dict)):
+                return value.copy()
+            return value
+        return wrapper
+    return decorator
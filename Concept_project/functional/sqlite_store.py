@@ -0,0 +1,358 @@
+"""SQLite storage backend for transactions, budgets and savings goals.
+
+A path ending in .db, .sqlite or .sqlite3 selects this backend wherever a JSON file path is accepted
+(financial_analysis.transaction_file_path and the transaction, budget and savings goal paths of the GUI);
+the three kinds of records can share one database. Filters and sums run in SQL on indexed columns and
+every write is one SQL transaction.
+Migrate the JSON files with: python sqlite_store.py migrate <JSON directory> <database>
+"""
+import calendar
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from date_parser import parse_any_date
+from money import cents_to_amount, to_cents
+from transaction_log import iter_ledger_file, iter_transactions
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+# the expense type, as TransactionType["EXPENSE"] of trans_budget (which imports this module)
+EXPENSE = "Expense"
+
+# amounts are stored in integer cents, see money.py;
+# dates are stored in canonical YYYY-MM-DD form so that ranges and months are index range scans;
+# a date that does not parse is kept in raw_date and leaves date NULL, like day 0 in the columnar store
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    date TEXT,
+    raw_date TEXT
+);
+CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS transactions_category_date ON transactions (category, date);
+CREATE INDEX IF NOT EXISTS transactions_type_date ON transactions (type, date);
+
+CREATE TABLE IF NOT EXISTS budgets (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    year INTEGER,
+    month INTEGER,
+    limit_cents INTEGER NOT NULL,
+    spent_cents INTEGER NOT NULL DEFAULT 0,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS budgets_category ON budgets (category);
+
+CREATE TABLE IF NOT EXISTS savings_goals (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    target_amount REAL NOT NULL,
+    target_date TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS savings_goals_name ON savings_goals (name);
+"""
+
+BUDGET_FIELDS = ("category", "limit", "spent", "year", "month")
+
+
+def is_sqlite_path(file_path: str) -> bool:
+    return isinstance(file_path, str) and file_path.lower().endswith(SQLITE_EXTENSIONS)
+
+
+# open a database, creating its tables and indexes if needed
+def connect(db_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# open the database at db_path, run action(connection, *args) and close it again
+def with_database(db_path: str, action: Callable[..., Any], *args: Any) -> Any:
+    connection = connect(db_path)
+    try:
+        return action(connection, *args)
+    finally:
+        connection.close()
+
+
+# counter that changes whenever another connection commits to the database
+def data_version(connection: sqlite3.Connection) -> int:
+    return connection.execute("PRAGMA data_version").fetchone()[0]
+
+
+# canonical YYYY-MM-DD form of a date string, None if it does not parse
+def canonical_date(date_str: Any) -> Optional[str]:
+    parsed = parse_any_date(date_str) if isinstance(date_str, str) else None
+    return parsed.date().isoformat() if parsed else None
+
+
+def transaction_row(transaction: Dict[str, Any]) -> Tuple[str, int, str, Optional[str], Optional[str]]:
+    date = canonical_date(transaction["date"])
+    return (transaction["category"], to_cents(transaction["amount"]), transaction["type"], date,
+            None if date else str(transaction["date"]))
+
+
+# The *_rows functions write inside the SQL transaction of the caller, the other write functions commit.
+
+# insert transactions without committing, returns how many were inserted
+def insert_transaction_rows(connection: sqlite3.Connection, transactions: Iterable[Dict[str, Any]]) -> int:
+    return connection.executemany(
+        "INSERT INTO transactions (category, amount_cents, type, date, raw_date) VALUES (?, ?, ?, ?, ?)",
+        map(transaction_row, transactions),
+    ).rowcount
+
+
+# insert transactions in one SQL transaction, returns how many were inserted
+def insert_transactions(connection: sqlite3.Connection, transactions: Iterable[Dict[str, Any]]) -> int:
+    with connection:
+        return insert_transaction_rows(connection, transactions)
+
+
+# stream the transactions in insertion order as dicts shaped like the JSON records, optionally only those of
+# a category and within an inclusive range of YYYY-MM-DD dates (None for no bound)
+def iter_transaction_rows(connection: sqlite3.Connection, category: Optional[str] = None,
+                          start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    clauses, params = [], []
+    if category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    if start_date is not None:
+        clauses.append("date >= ?")
+        params.append(start_date)
+    if end_date is not None:
+        clauses.append("date <= ?")
+        params.append(end_date)
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    cursor = connection.execute(
+        f"SELECT category, amount_cents, type, coalesce(date, raw_date) FROM transactions {where}ORDER BY id", params
+    )
+    for category, cents, type, date in cursor:
+        yield {"category": category, "amount": cents_to_amount(cents), "type": type, "date": date}
+
+
+# WHERE clause and parameters selecting expenses; "" category, None bounds (YYYY-MM-DD) and month 0 mean "any"
+def expense_filter(category: str = "", start_date: Optional[str] = None, end_date: Optional[str] = None,
+                   month: int = 0) -> Tuple[str, List[Any]]:
+    clauses, params = ["type = ?"], [EXPENSE]
+    if category != "":
+        clauses.append("category = ?")
+        params.append(category)
+    if start_date is not None:
+        clauses.append("date >= ?")
+        params.append(start_date)
+    if end_date is not None:
+        clauses.append("date <= ?")
+        params.append(end_date)
+    if month:
+        clauses.append("substr(date, 6, 2) = ?")
+        params.append(f"{month:02d}")
+    return " AND ".join(clauses), params
+
+
+# sum in cents of the expenses matching the filters of expense_filter
+def sum_expenses(connection: sqlite3.Connection, category: str = "", start_date: Optional[str] = None,
+                 end_date: Optional[str] = None, month: int = 0) -> int:
+    where, params = expense_filter(category, start_date, end_date, month)
+    return connection.execute(f"SELECT coalesce(sum(amount_cents), 0) FROM transactions WHERE {where}", params).fetchone()[0]
+
+
+# expense total of a category ("" means any) in a month of a year
+def month_expenses(connection: sqlite3.Connection, category: str, year: int, month: int) -> int:
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        return 0
+    last_day = calendar.monthrange(year, month)[1]
+    return sum_expenses(connection, category, f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last_day:02d}")
+
+
+# spending of every category ("" for all) in each month of the year, summed over the years
+def month_totals(connection: sqlite3.Connection) -> Dict[Tuple[str, int], int]:
+    totals, all_categories = {}, {}
+    cursor = connection.execute(
+        "SELECT category, CAST(substr(date, 6, 2) AS INTEGER), sum(amount_cents) FROM transactions"
+        " WHERE type = ? AND date IS NOT NULL GROUP BY 1, 2",
+        [EXPENSE],
+    )
+    for category, month, total in cursor:
+        totals[category, month] = total
+        all_categories["", month] = all_categories.get(("", month), 0) + total
+    totals.update(all_categories)
+    return totals
+
+
+def has_category(connection: sqlite3.Connection, category: str) -> bool:
+    return connection.execute("SELECT 1 FROM transactions WHERE category = ? LIMIT 1", [category]).fetchone() is not None
+
+
+# categories in order of first appearance
+def category_names(connection: sqlite3.Connection) -> List[str]:
+    cursor = connection.execute("SELECT category FROM transactions GROUP BY category ORDER BY min(id)")
+    return [category for category, in cursor]
+
+
+# expense total of every category
+def category_totals(connection: sqlite3.Connection) -> Dict[str, int]:
+    cursor = connection.execute("SELECT category, sum(amount_cents) FROM transactions WHERE type = ? GROUP BY category", [EXPENSE])
+    return dict(cursor.fetchall())
+
+
+def budget_row(budget: Dict[str, Any]) -> Tuple[str, Optional[int], Optional[int], int, int, Optional[str]]:
+    extra = {key: value for key, value in budget.items() if key not in BUDGET_FIELDS}
+    return (budget["category"], budget.get("year"), budget.get("month"), to_cents(budget["limit"]),
+            to_cents(budget.get("spent", 0)), json.dumps(extra) if extra else None)
+
+
+def insert_budget_rows(connection: sqlite3.Connection, budgets: Iterable[Dict[str, Any]]) -> int:
+    return connection.executemany(
+        "INSERT INTO budgets (category, year, month, limit_cents, spent_cents, extra) VALUES (?, ?, ?, ?, ?, ?)",
+        map(budget_row, budgets)
+    ).rowcount
+
+
+# the budgets as dicts shaped like the records of budget_db.json
+def load_budgets(connection: sqlite3.Connection) -> List[Dict[str, Any]]:
+    cursor = connection.execute("SELECT category, limit_cents, spent_cents, year, month, extra FROM budgets ORDER BY id")
+    return [
+        {"category": category, "limit": cents_to_amount(limit), "spent": cents_to_amount(spent),
+         **({"year": year} if year is not None else {}),
+         **({"month": month} if month is not None else {}),
+         **(json.loads(extra) if extra else {})}
+        for category, limit, spent, year, month, extra in cursor
+    ]
+
+
+# WHERE clause and parameters selecting the budgets an expense of a category in a year and month is charged to,
+# as trans_budget.matching_budgets: a budget without a year or month covers them all, an unknown date matches
+# every budget of the category
+def budget_filter(category: str, year: Optional[int] = None, month: Optional[int] = None) -> Tuple[str, List[Any]]:
+    if year is None or month is None:
+        return "category = ?", [category]
+    return "category = ? AND (year IS NULL OR year = ?) AND (month IS NULL OR month = ?)", [category, year, month]
+
+
+# add an expense to the budgets it is charged to without committing,
+# returns the (limit, spent) amounts of the budgets of its category over their limit
+def add_budget_spending_rows(connection: sqlite3.Connection, category: str, amount: Any, year: Optional[int] = None,
+                             month: Optional[int] = None) -> List[Tuple[float, float]]:
+    where, params = budget_filter(category, year, month)
+    connection.execute(f"UPDATE budgets SET spent_cents = spent_cents + ? WHERE {where}", [to_cents(amount)] + params)
+    cursor = connection.execute(
+        "SELECT limit_cents, spent_cents FROM budgets WHERE category = ? AND spent_cents > limit_cents ORDER BY id", [category]
+    )
+    return [(cents_to_amount(limit), cents_to_amount(spent)) for limit, spent in cursor]
+
+
+def add_budget_spending(connection: sqlite3.Connection, category: str, amount: Any, year: Optional[int] = None,
+                        month: Optional[int] = None) -> List[Tuple[float, float]]:
+    with connection:
+        return add_budget_spending_rows(connection, category, amount, year, month)
+
+
+# charge expense totals in cents, keyed by (category, year, month) as trans_budget.budget_totals, to the budgets
+# in one SQL transaction; returns the (category, limit, spent) of the budgets of those categories over their limit
+def add_budget_totals(connection: sqlite3.Connection,
+                      totals: Dict[Tuple[str, Optional[int], Optional[int]], int]) -> List[Tuple[str, float, float]]:
+    with connection:
+        for (category, year, month), cents in totals.items():
+            where, params = budget_filter(category, year, month)
+            connection.execute(f"UPDATE budgets SET spent_cents = spent_cents + ? WHERE {where}", [cents] + params)
+    categories = sorted({category for category, _, _ in totals})
+    if not categories:
+        return []
+    cursor = connection.execute(
+        f"SELECT category, limit_cents, spent_cents FROM budgets WHERE spent_cents > limit_cents "
+        f"AND category IN ({', '.join('?' * len(categories))}) ORDER BY id", categories
+    )
+    return [(category, cents_to_amount(limit), cents_to_amount(spent)) for category, limit, spent in cursor]
+
+
+# set the limit of the budgets of a category, returns how many were updated
+def set_budget_limit(connection: sqlite3.Connection, category: str, amount: Any) -> int:
+    with connection:
+        return connection.execute("UPDATE budgets SET limit_cents = ? WHERE category = ?", [to_cents(amount), category]).rowcount
+
+
+# insert an expense transaction and charge it to its budgets in one SQL transaction: every budget of its
+# category, or with by_month only those of its year and month; returns the budgets taken over their limit
+# as add_budget_spending
+def add_transaction_with_budget(connection: sqlite3.Connection, transaction: Dict[str, Any],
+                                by_month: bool = False) -> List[Tuple[float, float]]:
+    with connection:
+        insert_transaction_rows(connection, [transaction])
+        if transaction["type"] != EXPENSE:
+            return []
+        date = canonical_date(transaction["date"]) if by_month else None
+        year, month = (int(date[:4]), int(date[5:7])) if date else (None, None)
+        return add_budget_spending_rows(connection, transaction["category"], transaction["amount"], year, month)
+
+
+def insert_goal_rows(connection: sqlite3.Connection, goals: Iterable[Dict[str, Any]]) -> int:
+    return connection.executemany(
+        "INSERT INTO savings_goals (name, target_amount, target_date, progress) VALUES (?, ?, ?, ?)",
+        ((goal["name"], float(goal["target_amount"]), goal["target_date"], float(goal.get("progress", 0)))
+         for goal in goals),
+    ).rowcount
+
+
+def insert_goals(connection: sqlite3.Connection, goals: Iterable[Dict[str, Any]]) -> int:
+    with connection:
+        return insert_goal_rows(connection, goals)
+
+
+# the savings goals as dicts with the fields of Saving_goals.SavingsGoal
+def load_goals(connection: sqlite3.Connection) -> List[Dict[str, Any]]:
+    cursor = connection.execute("SELECT name, target_amount, target_date, progress FROM savings_goals ORDER BY id")
+    return [
+        {"name": name, "target_amount": target_amount, "target_date": target_date, "progress": progress}
+        for name, target_amount, target_date, progress in cursor
+    ]
+
+
+# add to the progress of the goals with a name; nothing changes and False is returned if the update is negative
+# or would take one of them past its target
+def add_goal_progress(connection: sqlite3.Connection, name: str, progress_update: float) -> bool:
+    if progress_update < 0:
+        return False
+    with connection:
+        overshoot = connection.execute(
+            "SELECT 1 FROM savings_goals WHERE name = ? AND progress + ? > target_amount LIMIT 1", [name, progress_update]
+        ).fetchone()
+        if overshoot:
+            return False
+        connection.execute("UPDATE savings_goals SET progress = progress + ? WHERE name = ?", [progress_update, name])
+    return True
+
+
+def reset_goals_progress(connection: sqlite3.Connection) -> int:
+    with connection:
+        return connection.execute("UPDATE savings_goals SET progress = 0").rowcount
+
+
+# import transactions.json (and its log), budget_db.json and savings_goal.json of a directory into a database,
+# replacing what the database held, in one SQL transaction; returns the number of rows of each table
+def migrate_json_directory(connection: sqlite3.Connection, json_directory: str) -> Dict[str, int]:
+    with connection:
+        for table in ("transactions", "budgets", "savings_goals"):
+            connection.execute(f"DELETE FROM {table}")
+        return {
+            "transactions": insert_transaction_rows(connection, iter_transactions(os.path.join(json_directory, "transactions.json"))),
+            "budgets": insert_budget_rows(connection, iter_ledger_file(os.path.join(json_directory, "budget_db.json"))),
+            "savings_goals": insert_goal_rows(connection, iter_ledger_file(os.path.join(json_directory, "savings_goal.json"))),
+        }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "migrate":
+        sys.exit("usage: python sqlite_store.py migrate <JSON directory> <database>")
+    connection = connect(sys.argv[3])
+    try:
+        for table, count in migrate_json_directory(connection, sys.argv[2]).items():
+            print(f"{table}: {count} rows")
+    finally:
+        connection.close()
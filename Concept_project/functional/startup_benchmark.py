@@ -0,0 +1,78 @@
+"""Startup benchmark: time to import the GUI and open its main window for ledgers of growing size.
+
+Importing financial_analysis does no I/O, so the startup time should not depend on the ledger size.
+Run with: python startup_benchmark.py [size ...]
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+LEDGER_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# the startup is considered constant if the largest ledger opens within this factor of the smallest
+MAX_SLOWDOWN = 2.0
+
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import financial_analysis
+financial_analysis.transaction_file_path = sys.argv[1]
+import GUI
+try:
+    root = GUI.tk.Tk()
+    root.withdraw()
+    GUI.FinancialAnalysisApp(root)
+    root.update_idletasks()
+    root.destroy()
+except GUI.tk.TclError:
+    pass  # no display, only the import is timed
+print(time.perf_counter() - start)
+"""
+
+
+def write_ledger(file_path: str, size: int):
+    categories = ["Food", "Rent", "Entertainment", "Other", "Salary"]
+    with open(file_path, "w") as file:
+        json.dump([
+            {
+                "category": random.choice(categories),
+                "amount": round(random.uniform(1, 500), 2),
+                "type": random.choice(["Income", "Expense"]),
+                "date": f"{random.randint(2000, 2024)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+            }
+            for _ in range(size)
+        ], file)
+
+
+# seconds to start the GUI in a fresh interpreter pointed at the given ledger, best of some runs
+def time_startup(file_path: str, runs: int = 3) -> float:
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = [
+        float(subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, file_path], cwd=here,
+                             capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1])
+        for _ in range(runs)
+    ]
+    return min(timings)
+
+
+def run_benchmark(sizes: List[int]) -> bool:
+    timings = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            file_path = os.path.join(directory, f"transactions_{size}.json")
+            write_ledger(file_path, size)
+            timings.append(time_startup(file_path))
+            print(f"{size:>10} transactions: {timings[-1] * 1000:8.1f} ms")
+
+    slowdown = timings[-1] / timings[0]
+    print(f"largest / smallest ledger startup: {slowdown:.2f}x")
+    return slowdown <= MAX_SLOWDOWN
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or LEDGER_SIZES
+    sys.exit(0 if run_benchmark(sizes) else 1)
@@ -0,0 +1,60 @@
+"""Tests of the CSV amount parsing of import_export.
+Run from this directory with: python -m unittest test_import_export
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from import_export import CsvFormat, clean_amount, import_file
+
+
+class CleanAmountTest(unittest.TestCase):
+    def test_thousands_separator_between_groups_of_three(self):
+        self.assertEqual(clean_amount("1,234.50", "."), "1234.50")
+        self.assertEqual(clean_amount("1.234,50", ","), "1234.50")
+
+    def test_separator_that_is_not_a_thousands_separator_is_rejected(self):
+        self.assertEqual(clean_amount("-5,00", "."), "")
+        self.assertEqual(clean_amount("1,5", "."), "")
+
+    def test_currency_around_the_number(self):
+        self.assertEqual(clean_amount("EUR 12.30", "."), "12.30")
+        self.assertEqual(clean_amount("-€ 1.234,50", ","), "-1234.50")
+
+    def test_letters_inside_the_number_are_rejected(self):
+        self.assertEqual(clean_amount("1e5", "."), "")
+        self.assertEqual(clean_amount("12a3", "."), "")
+
+
+class CsvImportTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def import_csv(self, text, csv_format):
+        csv_path = os.path.join(self.directory.name, "bank.csv")
+        ledger_path = os.path.join(self.directory.name, "ledger.json")
+        with open(csv_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        summary, transactions = import_file(csv_path, ledger_path, csv_format=csv_format, dedupe=False)
+        return summary, transactions
+
+    def test_signed_amount_with_a_type_column_is_imported_as_a_positive_amount(self):
+        csv_format = CsvFormat({"date": "Date", "amount": "Amount", "category": "Category", "type": "Type"}, ";", "utf-8", ",")
+        summary, transactions = self.import_csv("Date;Amount;Category;Type\n03.01.2024;-5,00;Food;Expense\n", csv_format)
+        self.assertEqual(summary.accepted, 1)
+        self.assertEqual(transactions[0]["amount"], 5.0)
+        self.assertEqual(transactions[0]["type"], "Expense")
+
+    def test_sign_gives_the_type_without_a_type_column(self):
+        csv_format = CsvFormat({"date": "Date", "amount": "Amount", "category": "Category"}, ";", "utf-8", ",")
+        summary, transactions = self.import_csv(
+            "Date;Amount;Category\n03.01.2024;-1.234,50;Food\n04.01.2024;+2.000,00;Salary\n05.01.2024;1e5;Food\n", csv_format
+        )
+        self.assertEqual((summary.accepted, summary.rejected), (2, 1))
+        self.assertEqual([(t["amount"], t["type"]) for t in transactions], [(1234.5, "Expense"), (2000.0, "Income")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,20 @@
 import json
+from collections import namedtuple
+from sys import intern
 from tkinter import Label, Tk, Button, Text, messagebox, simpledialog
 from tkinter.ttk import Combobox
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import date, datetime
+from itertools import chain, islice
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+
+from date_parser import SAMPLE_SIZE, detect_layout, make_date_parser, parse_any_date
+from money import cents_to_amount, to_cents
+from transaction_hashes import index_is_current, record_imported, transaction_key
+from transaction_log import append_transactions, iter_transactions
+from sqlite_store import (
+    is_sqlite_path, with_database, insert_transactions, iter_transaction_rows, load_budgets, add_budget_spending,
+    set_budget_limit, add_transaction_with_budget, add_budget_totals
+)
 
 # Define constants for TransactionType and Category
 TransactionType = {"INCOME": "Income", "EXPENSE": "Expense"}
@@ -25,6 +37,21 @@ PREDEFINED_CATEGORIES = [
 
 
 def load_data(file_path: str) -> List[Dict[str, Any]]:
+    return list(iter_data(file_path))
+
+
+# stream the records of a ledger (JSON array file and its JSON Lines log) one at a time with canonical dates,
+# without loading the whole file; the date format is detected from the first records
+def iter_data(file_path: str) -> Iterator[Dict[str, Any]]:
+    records = iter_transactions(file_path)
+    sample = list(islice(records, SAMPLE_SIZE))
+    normalize = date_normalizer(sample)
+    for record in chain(sample, records):
+        yield normalize(record)
+
+
+# the budgets of budget_db.json, a plain JSON array without log nor dates to normalize; [] if it does not exist
+def load_budget_file(file_path: str) -> List[Dict[str, Any]]:
     try:
         with open(file_path, "r") as file:
             return json.load(file)
@@ -37,6 +64,20 @@ def save_data(file_path: str, data: List[Dict[str, Any]]):
         json.dump(data, file, indent=4)
 
 
+# the transactions of a ledger, from its JSON files or its SQLite database
+def load_transaction_data(file_path: str) -> List[Dict[str, Any]]:
+    if is_sqlite_path(file_path):
+        return with_database(file_path, lambda connection: list(iter_transaction_rows(connection)))
+    return load_data(file_path)
+
+
+# the budgets, from budget_db.json or a SQLite database
+def load_budget_data(file_path: str) -> List[Dict[str, Any]]:
+    if is_sqlite_path(file_path):
+        return with_database(file_path, load_budgets)
+    return load_budget_file(file_path)
+
+
 def add_transaction(
     category: str, amount: float, type: str, date: str, transactions: List[Dict[str, Any]], budgets: List[Dict[str, Any]]
 ) -> (List[Dict[str, Any]], List[Dict[str, Any]]):  # type: ignore
@@ -45,7 +86,7 @@ def add_transaction(
 
     # Update budget dynamically
     if type == TransactionType["EXPENSE"]:
-        updated_budgets = update_budget(category, amount, budgets)
+        updated_budgets = update_budget(category, amount, budgets, date)
     else:
         updated_budgets = budgets
 
@@ -54,80 +95,265 @@ def add_transaction(
 
 
 
-def update_budget(category: str, amount: float, budgets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Update the budget for a specific category using recursion."""
-    if not budgets:
-        return []  # Base case: return an empty list if there are no budgets left to process
+def warn_limit_exceeded(category: str, limit: float, spent: float):
+    messagebox.showwarning(
+        "Spending Limit Exceeded",
+        f"You have exceeded the spending limit for {category}. "
+        f"Your budget limit is {limit} and you are trying to spend {spent}."
+    )
 
-    head, *tail = budgets  # Split the list into head and tail
 
-    if head["category"] == category:
-        new_spent = head["spent"] + amount
-        if new_spent > head["limit"]:
-            messagebox.showwarning(
-                "Spending Limit Exceeded",
-                f"You have exceeded the spending limit for {category}. "
-                f"Your budget limit is {head['limit']} and you are trying to spend {new_spent}."
-            )
-        updated_item = {**head, "spent": new_spent}
-    else:
-        updated_item = head  # Keep the item unchanged if it's not the matching category
+# Budgets keyed by (category, year, month) so that charging an expense or setting a limit touches only the
+# budgets concerned; a budget without a year or month covers every year or month. budgets holds the budget
+# dicts in file order (for saving), keys the positions of the budgets of each key and categories the positions
+# of the budgets of each category. The store has its own list and replaces a budget it changes by an updated
+# copy, so the budgets it was built from are left as they are.
+BudgetStore = namedtuple("BudgetStore", ["budgets", "keys", "categories"])
 
-    return [updated_item] + update_budget(category, amount, tail)  # Recur for the tail
+# charge an expense only to the budgets of its year and month (and those without a year or month) instead of
+# every budget of its category
+BUDGETS_BY_MONTH = False
 
 
-def update_budget_limit(category: str, amount: float, budgets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Update the budget limit for a specific category using recursion."""
-    if not budgets:
-        return []  # Base case: return an empty list if there are no budgets left to process
+def budget_key(budget: Dict[str, Any]) -> Tuple[str, Optional[int], Optional[int]]:
+    return budget["category"], budget.get("year"), budget.get("month")
 
-    head, *tail = budgets  # Split the list into head and tail
 
-    if head["category"] == category:
-        updated_item = {**head, "limit": amount}
-    else:
-        updated_item = head  # Keep the item unchanged if it's not the matching category
+def index_budget(store: BudgetStore, position: int):
+    budget = store.budgets[position]
+    store.keys.setdefault(budget_key(budget), []).append(position)
+    store.categories.setdefault(budget["category"], []).append(position)
+
+
+def add_budget(store: BudgetStore, budget: Dict[str, Any]):
+    store.budgets.append(budget)
+    index_budget(store, len(store.budgets) - 1)
+
+
+def build_budget_store(budgets: Iterable[Dict[str, Any]]) -> BudgetStore:
+    store = BudgetStore(list(budgets), {}, {})
+    for position in range(len(store.budgets)):
+        index_budget(store, position)
+    return store
+
+
+# positions of the budgets an expense of a category in a year and month is charged to, at most four lookups;
+# an expense whose date is unknown is charged to every budget of its category
+def matching_budgets(store: BudgetStore, category: str, year: Optional[int], month: Optional[int]) -> List[int]:
+    if year is None or month is None:
+        return store.categories.get(category, [])
+    keys = ((category, year, month), (category, None, month), (category, year, None), (category, None, None))
+    return [position for key in keys for position in store.keys.get(key, ())]
+
+
+# year and month of a transaction date, None for both if it does not parse
+def year_month(date_str: Any) -> Tuple[Optional[int], Optional[int]]:
+    parsed = parse_canonical_date(date_str) if isinstance(date_str, str) else None
+    return (parsed.year, parsed.month) if parsed else (None, None)
+
+
+# year and month an expense of that date is charged to, None for both (every budget of its category) unless
+# BUDGETS_BY_MONTH is set
+def budget_period(date_str: Any) -> Tuple[Optional[int], Optional[int]]:
+    return year_month(date_str) if BUDGETS_BY_MONTH else (None, None)
+
+
+# expense totals in cents of transactions keyed by (category, year, month) as given by budget_period, in one pass
+def budget_totals(transactions: Iterable[Dict[str, Any]],
+                  totals: Optional[Dict[Tuple[str, Optional[int], Optional[int]], int]] = None
+                  ) -> Dict[Tuple[str, Optional[int], Optional[int]], int]:
+    totals = {} if totals is None else totals
+    for transaction in transactions:
+        if transaction["type"] != TransactionType["EXPENSE"]:
+            continue
+        key = (transaction["category"], *budget_period(transaction["date"]))
+        totals[key] = totals.get(key, 0) + to_cents(transaction["amount"])
+    return totals
+
+
+# charge expense totals (see budget_totals) to the budgets of the store, each budget is updated once;
+# returns the (category, limit, spent) of the budgets charged over their limit
+def charge_budget_totals(store: BudgetStore, totals: Dict[Tuple[str, Optional[int], Optional[int]], int]
+                         ) -> List[Tuple[str, float, float]]:
+    charges = {}
+    for (category, year, month), cents in totals.items():
+        for position in matching_budgets(store, category, year, month):
+            charges[position] = charges.get(position, 0) + cents
+    exceeded = []
+    for position in sorted(charges):
+        budget = store.budgets[position] = {
+            **store.budgets[position], "spent": cents_to_amount(to_cents(store.budgets[position]["spent"]) + charges[position])
+        }
+        if budget["spent"] > budget["limit"]:
+            exceeded.append((budget["category"], budget["limit"], budget["spent"]))
+    return exceeded
+
+
+# set the limit of the budgets of a category, of one year and month when given; returns how many were set
+def set_limit(store: BudgetStore, category: str, amount: float, year: Optional[int] = None,
+              month: Optional[int] = None) -> int:
+    positions = store.categories.get(category, []) if year is None and month is None else store.keys.get((category, year, month), [])
+    for position in positions:
+        store.budgets[position] = {**store.budgets[position], "limit": amount}
+    return len(positions)
+
+
+# charge expense totals (see budget_totals) to the budgets of a JSON file or SQLite database in one write,
+# returns the budgets over their limit as charge_budget_totals
+def charge_budget_file(budget_file_path: str, totals: Dict[Tuple[str, Optional[int], Optional[int]], int]
+                       ) -> List[Tuple[str, float, float]]:
+    if not totals:
+        return []
+    if is_sqlite_path(budget_file_path):
+        return with_database(budget_file_path, add_budget_totals, totals)
+    store = build_budget_store(load_budget_file(budget_file_path))
+    exceeded = charge_budget_totals(store, totals)
+    save_data(budget_file_path, store.budgets)
+    return exceeded
+
+
+def update_budget(category: str, amount: float, budgets: List[Dict[str, Any]], date: Any = None) -> List[Dict[str, Any]]:
+    """Charge an expense of a category, on a date when given, to its budgets and warn about exceeded limits."""
+    store = build_budget_store(budgets)
+    for _, limit, spent in charge_budget_totals(store, {(category, *budget_period(date)): to_cents(amount)}):
+        warn_limit_exceeded(category, limit, spent)
+    return store.budgets
 
-    return [updated_item] + update_budget_limit(category, amount, tail)  # Recur for the tail
+
+def update_budget_limit(category: str, amount: float, budgets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Set the limit of every budget of a category."""
+    store = build_budget_store(budgets)
+    set_limit(store, category, amount)
+    return store.budgets
 
 
-# do date parsing
+# do date parsing, the supported formats go through the fast parser of date_parser
 def parse_date(date_str, formats=None):
     if formats is None:
-        formats = ["%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y"]
-    
+        return parse_any_date(date_str)
     if not formats:
         return None
-    
-    try:
-        return datetime.strptime(date_str, formats[0])
-    except ValueError:
+
+    # custom formats: the first one, then YYYY-MM-DD, then the others
+    for date_format in [formats[0], "%Y-%m-%d"] + list(formats[1:]):
         try:
-            return datetime.strptime(date_str, "%Y-%m-%d")
+            return datetime.strptime(date_str, date_format)
         except ValueError:
-            return parse_date(date_str, formats[1:])
+            continue
+    return None
+
+# convert any supported date string to the canonical YYYY-MM-DD form, unparseable strings are kept as they are
+def to_canonical_date(date_str: str, parser: Callable[[str], Optional[datetime]] = parse_any_date) -> str:
+    parsed = parser(date_str)
+    return parsed.date().isoformat() if parsed else date_str
+
+
+# parse a date, taking the fast path for canonical YYYY-MM-DD strings; fromisoformat also accepts other ISO 8601
+# layouts such as 20241201, so only strings laid out as YYYY-MM-DD take it
+def parse_canonical_date(date_str: str) -> Optional[date]:
+    if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-":
+        try:
+            return date.fromisoformat(date_str)
+        except ValueError:
+            pass
+    parsed = parse_date(date_str)
+    return parsed.date() if parsed else None
+
+
+# fields whose values repeat across the records and are interned, like the keys of every record
+INTERNED_FIELDS = ("category", "type")
+
+
+# copy of a record with the given date whose keys and repeated string values are shared with the other records;
+# the JSON decoder creates new key strings for every record of a streamed file
+def compact_record(record: Dict[str, Any], date_str: Any) -> Dict[str, Any]:
+    compact = {
+        intern(key): intern(value) if key in INTERNED_FIELDS and isinstance(value, str) else value
+        for key, value in record.items()
+    }
+    compact["date"] = date_str
+    return compact
+
+
+# build a function rewriting the date of a record in canonical form, with a parser specialized for the dominant
+# date format of the sample records; each distinct date string is parsed only once
+def date_normalizer(sample: List[Any]) -> Callable[[Any], Any]:
+    layout = detect_layout(record["date"] for record in sample if isinstance(record, dict) and "date" in record)
+    parser = make_date_parser(layout)
+    canonical = {}
+
+    def normalize(record):
+        if not isinstance(record, dict) or "date" not in record:
+            return record
+        date_str = record["date"]
+        if date_str not in canonical:
+            canonical[date_str] = to_canonical_date(date_str, parser)
+        return compact_record(record, canonical[date_str])
+
+    return normalize
+
+
+# rewrite every transaction date in canonical form
+def normalize_dates(records: Any) -> Any:
+    if not isinstance(records, list):
+        return records
+    normalize = date_normalizer(records[:SAMPLE_SIZE])
+    return [normalize(record) for record in records]
+
+
+def format_transaction(transaction: Dict[str, Any]) -> str:
+    return f"{transaction['category']} | {transaction['amount']} | {transaction['type']} | {parse_canonical_date(transaction['date']).strftime('%d/%m/%Y')}"
 
 def format_transactions(transactions: List[Dict[str, Any]]) -> str:
-    if not transactions:
-        return ""
-    
-    transaction = transactions[0]
-    formatted_transaction = f"{transaction['category']} | {transaction['amount']} | {transaction['type']} | {parse_date(transaction['date']).strftime('%d/%m/%Y')}"
-    
-    return formatted_transaction + "\n" + format_transactions(transactions[1:])
+    return "".join(format_transaction(transaction) + "\n" for transaction in transactions or [])
+
+def format_budget(budget: Dict[str, Any]) -> str:
+    return f"Category: {budget['category']}, Month: {budget['month']}, Limit: {budget['limit']}, Spent: {budget['spent']}"
 
 def format_budgets(budgets: List[Dict[str, Any]], result: str = "") -> str:
-    if not budgets:
-        return result.strip()
-    
-    budget = budgets[0]
-    formatted_budget = f"Category: {budget['category']}, Month: {budget['month']}, Limit: {budget['limit']}, Spent: {budget['spent']}"
-    
-    return format_budgets(budgets[1:], result + formatted_budget + "\n")
+    return (result + "".join(format_budget(budget) + "\n" for budget in budgets)).strip()
+
+
+# save a new transaction and charge it to the budgets, each to SQLite or JSON depending on its path;
+# with transactions and budgets in the same database both writes are one SQL transaction. The hash of the
+# transaction is added to the dedup index of the ledger when it has one that is up to date.
+def save_new_transaction(transaction_file_path: str, budget_file_path: str, category: str, amount: float, type: str,
+                         date: str) -> Dict[str, Any]:
+    indexed = index_is_current(transaction_file_path)
+    if is_sqlite_path(transaction_file_path) and transaction_file_path == budget_file_path:
+        new_transaction = {"category": category, "amount": amount, "type": type, "date": date}
+        for limit, spent in with_database(transaction_file_path, add_transaction_with_budget, new_transaction, BUDGETS_BY_MONTH):
+            warn_limit_exceeded(category, limit, spent)
+        if indexed:
+            record_imported(transaction_file_path, [transaction_key(new_transaction)])
+        return new_transaction
+
+    # Load the budgets, the transactions are not needed to add one
+    budgets = [] if is_sqlite_path(budget_file_path) else load_budget_file(budget_file_path)
+
+    # Add transaction and dynamically update budgets
+    updated_transactions, updated_budgets = add_transaction(
+        category, amount, type, date, [], budgets
+    )
+
+    # Append the transaction to the log (or insert it) and save the budgets
+    if is_sqlite_path(transaction_file_path):
+        with_database(transaction_file_path, insert_transactions, updated_transactions)
+    else:
+        append_transactions(transaction_file_path, updated_transactions)
+    if indexed:
+        record_imported(transaction_file_path, map(transaction_key, updated_transactions))
+    if not is_sqlite_path(budget_file_path):
+        save_data(budget_file_path, updated_budgets)
+    elif type == TransactionType["EXPENSE"]:
+        for limit, spent in with_database(budget_file_path, add_budget_spending, category, amount, *budget_period(date)):
+            warn_limit_exceeded(category, limit, spent)
+    return updated_transactions[-1]
 
 
 # GUI interaction functions
-def handle_add_transaction(transaction_file_path: str, budget_file_path: str, output_text: Text):
+def handle_add_transaction(transaction_file_path: str, budget_file_path: str, output_text: Text,
+                           on_added: Optional[Callable[[Dict[str, Any]], None]] = None):
     category_window = Tk()
     category_window.title("Select Transaction Category")
 
@@ -168,21 +394,9 @@ def handle_add_transaction(transaction_file_path: str, budget_file_path: str, ou
             category_window.destroy()
             return
 
-        # Load existing data
-        transaction_data = load_data(transaction_file_path)
-        budget_data = load_data(budget_file_path)
-
-        transactions = transaction_data
-        budgets = budget_data
-
-        # Add transaction and dynamically update budgets
-        updated_transactions, updated_budgets = add_transaction(
-            category, amount, type, date, transactions, budgets
-        )
-
-        # Save updated data
-        save_data(transaction_file_path, updated_transactions)
-        save_data(budget_file_path, updated_budgets)
+        new_transaction = save_new_transaction(transaction_file_path, budget_file_path, category, amount, type, date)
+        if on_added is not None:
+            on_added(new_transaction)
 
         output_text.delete(1.0, "end")
         output_text.insert("end", "Transaction added and budget updated successfully.")
@@ -194,7 +408,7 @@ def handle_add_transaction(transaction_file_path: str, budget_file_path: str, ou
 
 
 def handle_view_all_transactions(transaction_file_path: str, output_text: Text):
-    data = load_data(transaction_file_path)
+    data = load_transaction_data(transaction_file_path)
 
     if not data:
         output_text.delete(1.0, "end")
@@ -219,16 +433,19 @@ def handle_update_budget(budget_file_path: str, output_text: Text):
         messagebox.showwarning("Input Error", str(e))
         return
 
-    data = load_data(budget_file_path)
-    updated_budgets = update_budget_limit(category, amount, data)
-    save_data(budget_file_path, updated_budgets)
+    if is_sqlite_path(budget_file_path):
+        with_database(budget_file_path, set_budget_limit, category, amount)
+    else:
+        data = load_budget_file(budget_file_path)
+        updated_budgets = update_budget_limit(category, amount, data)
+        save_data(budget_file_path, updated_budgets)
 
     output_text.delete(1.0, "end")
     output_text.insert("end", "Budget updated successfully.")
 
 
 def handle_view_all_budgets(budget_file_path: str, output_text: Text):
-    data = load_data(budget_file_path)
+    data = load_budget_data(budget_file_path)
 
     if not data:
         output_text.delete(1.0, "end")
@@ -0,0 +1,108 @@
+"""Hash file of the transactions of a ledger (transactions.hashes), the storage of the dedup index.
+
+Each transaction is hashed on its normalized (date, amount, category, type): canonical date, integer cents,
+category and type without surrounding spaces and ignoring case. The file holds the 16-byte hashes after a header
+with the size and modification time of the ledger files they describe. Whatever appends transactions to a
+ledger adds their hashes with record_imported, provided the file described the ledger before the write, so the
+index is not rebuilt after a plain add. Only depends on modules trans_budget imports itself.
+"""
+import hashlib
+import os
+import struct
+import tempfile
+from collections import Counter
+from typing import Any, Dict, Iterable, Tuple
+
+from date_parser import parse_any_date
+from money import to_cents
+from sqlite_store import is_sqlite_path
+from transaction_log import log_file_path
+
+INDEX_EXTENSION = ".hashes"
+
+MAGIC = b"FAHASH01"
+
+# magic, then the size and modification time in nanoseconds of the ledger file and of its log
+HEADER = struct.Struct("<8sQqQq")
+
+DIGEST_SIZE = 16
+
+
+def index_file_path(database_file: str) -> str:
+    return os.path.splitext(database_file)[0] + INDEX_EXTENSION
+
+
+# content hash of a transaction on its normalized date, amount, category and type
+def transaction_key(transaction: Dict[str, Any]) -> bytes:
+    date = transaction["date"]
+    parsed = parse_any_date(date) if isinstance(date, str) else None
+    date = parsed.date().isoformat() if parsed else str(date)
+    normalized = "\x1f".join((date, str(to_cents(transaction["amount"])),
+                              str(transaction["category"]).strip().casefold(), str(transaction["type"]).strip().casefold()))
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+# size and modification time of the ledger file and of its log, zeros for a file that does not exist
+def ledger_fingerprint(database_file: str) -> Tuple[int, int, int, int]:
+    def stat(file_path):
+        try:
+            result = os.stat(file_path)
+        except FileNotFoundError:
+            return 0, 0
+        return result.st_size, result.st_mtime_ns
+    log_path = log_file_path(database_file)
+    return stat(database_file) + (stat(log_path) if log_path != database_file and not is_sqlite_path(database_file) else (0, 0))
+
+
+def write_index(database_file: str, digests: Iterable[bytes]):
+    index_path = index_file_path(database_file)
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)), suffix=".tmp")
+    try:
+        with open(descriptor, "wb") as file:
+            file.write(HEADER.pack(MAGIC, *ledger_fingerprint(database_file)))
+            file.writelines(digests)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, index_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def read_index(database_file: str) -> Counter:
+    try:
+        with open(index_file_path(database_file), "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < HEADER.size or (len(data) - HEADER.size) % DIGEST_SIZE:
+        return None
+    magic, *fingerprint = HEADER.unpack_from(data)
+    if magic != MAGIC or tuple(fingerprint) != ledger_fingerprint(database_file):
+        return None
+    return Counter(data[offset:offset + DIGEST_SIZE] for offset in range(HEADER.size, len(data), DIGEST_SIZE))
+
+
+# whether the ledger has a hash file that describes it as it is, checked on the header alone
+def index_is_current(database_file: str) -> bool:
+    try:
+        with open(index_file_path(database_file), "rb") as file:
+            header = file.read(HEADER.size)
+    except FileNotFoundError:
+        return False
+    if len(header) < HEADER.size:
+        return False
+    magic, *fingerprint = HEADER.unpack(header)
+    return magic == MAGIC and tuple(fingerprint) == ledger_fingerprint(database_file)
+
+
+# add the hashes of transactions just saved to the ledger to its index, which then describes the ledger as it is now
+def record_imported(database_file: str, digests: Iterable[bytes]):
+    index_path = index_file_path(database_file)
+    with open(index_path, "r+b") as file:
+        file.seek(0, os.SEEK_END)
+        file.writelines(digests)
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, *ledger_fingerprint(database_file)))
+        file.flush()
+        os.fsync(file.fileno())
@@ -0,0 +1,150 @@
+"""Append-only JSON Lines log of transactions.
+
+A ledger is a legacy JSON array file (transactions.json) plus a log next to it (transactions.jsonl) with one
+record per line. Adding transactions appends to the log, so its cost does not depend on the ledger size;
+compaction folds the log back into the array file.
+Run with: python transaction_log.py compact <ledger.json>
+"""
+import json
+import os
+import sys
+import tempfile
+import textwrap
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator
+
+from json_stream import iter_json_array
+
+LOG_EXTENSION = ".jsonl"
+
+
+# path of the log kept next to a ledger file; a .jsonl ledger is its own log
+def log_file_path(file_path: str) -> str:
+    if file_path.endswith(LOG_EXTENSION):
+        return file_path
+    return os.path.splitext(file_path)[0] + LOG_EXTENSION
+
+
+# yield the records of a log, one JSON document per line. A last line without newline that does not decode
+# is the remainder of an interrupted append and is ignored.
+def iter_log(log_path: str) -> Iterator[Any]:
+    try:
+        file = open(log_path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                if not line.endswith("\n"):
+                    return
+                raise ValueError(f"{log_path}, line {number}: not a JSON record.")
+            yield record
+
+
+# yield the records of a ledger file in either format, a JSON array or JSON Lines; nothing if it does not exist
+def iter_ledger_file(file_path: str) -> Iterator[Any]:
+    try:
+        file = open(file_path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with file:
+        first = file.read(1)
+        while first and first.isspace():
+            first = file.read(1)
+    if first == "[":
+        with open(file_path, "r", encoding="utf-8") as file:
+            yield from iter_json_array(file)
+    elif first:
+        yield from iter_log(file_path)
+
+
+# yield every transaction of a ledger: the records of the ledger file followed by the records of its log
+def iter_transactions(file_path: str) -> Iterator[Dict[str, Any]]:
+    log_path = log_file_path(file_path)
+    if log_path == file_path:
+        return iter_ledger_file(file_path)
+    return chain(iter_ledger_file(file_path), iter_log(log_path))
+
+
+# drop the remainder of an interrupted append so the next record starts on its own line
+def repair_log_tail(file):
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    if size == 0:
+        return
+    file.seek(size - 1)
+    if file.read(1) == b"\n":
+        return
+    start = size - 1
+    while start > 0:
+        step = min(start, 4096)
+        file.seek(start - step)
+        newline = file.read(step).rfind(b"\n")
+        if newline >= 0:
+            start = start - step + newline + 1
+            break
+        start -= step
+    file.seek(start)
+    try:
+        json.loads(file.read())
+        file.write(b"\n")
+    except ValueError:
+        file.truncate(start)
+
+
+# append transactions to the log of a ledger, the ledger file itself is not touched. The transactions may be
+# a stream; if it fails part way, the records already written are truncated away.
+def append_transactions(file_path: str, transactions: Iterable[Dict[str, Any]]):
+    with open(log_file_path(file_path), "a+b") as file:
+        repair_log_tail(file)
+        start = file.seek(0, os.SEEK_END)
+        try:
+            file.writelines((json.dumps(transaction) + "\n").encode("utf-8") for transaction in transactions)
+        except BaseException:
+            file.flush()
+            file.truncate(start)
+            raise
+        file.flush()
+        os.fsync(file.fileno())
+
+
+# replace a ledger with the given transactions, written as a JSON array in the layout of json.dump(indent=4),
+# and empty its log. The records are streamed to a temporary file that replaces the ledger at the end, or is
+# removed if writing fails.
+def write_transactions(file_path: str, transactions: Iterable[Dict[str, Any]]) -> int:
+    count = 0
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp")
+    try:
+        with open(descriptor, "w", encoding="utf-8") as file:
+            file.write("[")
+            for transaction in transactions:
+                file.write(("," if count else "") + "\n" + textwrap.indent(json.dumps(transaction, indent=4), "    "))
+                count += 1
+            file.write("\n]" if count else "]")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    log_path = log_file_path(file_path)
+    if log_path != file_path and os.path.exists(log_path):
+        os.remove(log_path)
+    return count
+
+
+# fold the log of a ledger into its JSON array file, returns the number of transactions of the ledger
+def compact(file_path: str) -> int:
+    if log_file_path(file_path) == file_path:
+        raise ValueError("Only a JSON array ledger can be compacted.")
+    return write_transactions(file_path, iter_transactions(file_path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "compact":
+        sys.exit("usage: python transaction_log.py compact <ledger.json>")
+    print(f"{compact(sys.argv[2])} transactions compacted into {sys.argv[2]}")
@@ -1,38 +1,53 @@
 #imperative code
 import json
+import sys
 from datetime import datetime
 
+from json_stream import iter_json_file
+from money import cents_to_amount, format_cents, to_cents
+
 class FinancialTransaction:
+    # fixed slots instead of a per-instance __dict__, millions of transactions can be kept in memory
+    __slots__ = ("category", "amount", "type", "date")
+
     def __init__(self, transaction_date, transaction_amount, transaction_type, transaction_category):
         self.category = transaction_category
         self.amount = transaction_amount
         self.type = transaction_type
         self.date = transaction_date
 
+    # the JSON record of the transaction, in the format load_database_from_file reads
+    def to_dict(self):
+        return {"date": self.date.strftime("%d-%m-%Y"), "amount": self.amount, "type": self.type, "category": self.category}
+
 # File path for the transactions database
 database_file_path = r"F:study\level 4\Concept\FinancialApp2\FinancialApp2\transactions.json"
 
 
 def save_database_to_file():
-    json_data = json.dumps([t.__dict__ for t in transaction_database])
+    json_data = json.dumps([t.to_dict() for t in transaction_database])
     with open(database_file_path, 'w') as file:
         file.write(json_data)
 
 def load_database_from_file():
     global transaction_database
     try:
-        with open(database_file_path, 'r') as file:
-            data = json.load(file)
-            transaction_database = []
-            for entry in data:
-                transaction_database.append(
-                    FinancialTransaction(
-                        datetime.strptime(entry["date"], "%d-%m-%Y"),  # Parse date
-                        entry["amount"],  # Amount
-                        entry["type"].lower(),  # Normalize type (case-insensitive)
-                        entry["category"]  # Category
-                    )
+        # read the entries one at a time instead of loading the whole file; transactions of the same day
+        # share one datetime and the category and type strings are interned
+        transaction_database = []
+        dates = {}
+        for entry in iter_json_file(database_file_path):
+            date_string = entry["date"]
+            if date_string not in dates:
+                dates[date_string] = datetime.strptime(date_string, "%d-%m-%Y")  # Parse date
+            transaction_database.append(
+                FinancialTransaction(
+                    dates[date_string],
+                    entry["amount"],  # Amount
+                    sys.intern(entry["type"].lower()),  # Normalize type (case-insensitive)
+                    sys.intern(entry["category"])  # Category
                 )
+            )
     except FileNotFoundError:
         print("No existing database file found. Starting fresh.")
 
@@ -126,10 +141,11 @@ def category_exist(category, transactions):
             return True
     return False
 
+# total spending in integer cents
 def calculate_spending(transactions, category, start_date_str, end_date_str, month):
     parsed_start_date = parse_date(start_date_str)
     parsed_end_date = parse_date(end_date_str)
-    total_spending = 0.0
+    total_spending = 0
 
     for transaction in transactions:
         date_within_range = is_date_within_range(transaction.date, parsed_start_date, parsed_end_date)
@@ -137,7 +153,7 @@ def calculate_spending(transactions, category, start_date_str, end_date_str, mon
         in_category = is_in_category(category, transaction.category)
 
         if transaction.type == "expense" and in_category and date_within_range and in_month:
-            total_spending += transaction.amount
+            total_spending += to_cents(transaction.amount)
 
     return total_spending
 
@@ -145,35 +161,35 @@ def sum_spending_for_year(year):
     start_date = datetime(year, 1, 1)
     end_date = datetime(year, 12, 31)
     total_spending = calculate_spending(transaction_database, "", start_date.strftime("%d/%m/%Y"), end_date.strftime("%d/%m/%Y"), 0)
-    return f"Total spending for year {year}: {total_spending:.2f}"
+    return f"Total spending for year {year}: {format_cents(total_spending)}"
 
 def sum_spending_for_day(date_string):
     date = parse_date(date_string)
     if date:
         total_spending = calculate_spending(transaction_database, "", date.strftime("%d/%m/%Y"), date.strftime("%d/%m/%Y"), 0)
-        return f"Total spending for day {date.day:02d}/{date.month:02d}/{date.year}: {total_spending:.2f}"
+        return f"Total spending for day {date.day:02d}/{date.month:02d}/{date.year}: {format_cents(total_spending)}"
     else:
         return "Invalid date format. Please use one of the supported formats."
 
 def sum_spending_in_date_range(start_date, end_date):
     total_spending = calculate_spending(transaction_database, "", start_date, end_date, 0)
     if start_date == "" and end_date == "":
-        return f"Total spending (from beginning to now): {total_spending:.2f}"
+        return f"Total spending (from beginning to now): {format_cents(total_spending)}"
     elif start_date == "":
-        return f"Total Spending (from beginning to {end_date}): {total_spending:.2f}"
+        return f"Total Spending (from beginning to {end_date}): {format_cents(total_spending)}"
     elif end_date == "":
-        return f"Total Spending (from {start_date} to now): {total_spending:.2f}"
+        return f"Total Spending (from {start_date} to now): {format_cents(total_spending)}"
     else:
-        return f"Total Spending (from {start_date} to {end_date}): {total_spending:.2f}"
+        return f"Total Spending (from {start_date} to {end_date}): {format_cents(total_spending)}"
 
 def sum_spending_for_month(month):
     total_spending = calculate_spending(transaction_database, "", "", "", month)
-    return f"Total Spending in Month {month}: {total_spending:.2f}"
+    return f"Total Spending in Month {month}: {format_cents(total_spending)}"
 
 def sum_spending_in_category(category):
     if category_exist(category, transaction_database):
         total_spending = calculate_spending(transaction_database, category, "", "", 0)
-        return f"Total Spending of {category}: {total_spending:.2f}"
+        return f"Total Spending of {category}: {format_cents(total_spending)}"
     else:
         return f"Sorry, the category {category} does not exist."
 
@@ -188,8 +204,8 @@ def sum_spending_in_category_and_month(category, month_year_string, print_total)
 
         if category_exist(category, transaction_database):
             if print_total:
-                return f"Total Spending of {category} in {month:02d}/{year}: {total_spending:.2f}"
-            return total_spending    
+                return f"Total Spending of {category} in {month:02d}/{year}: {format_cents(total_spending)}"
+            return cents_to_amount(total_spending)
         else:
             if print_total:
                 return f"Sorry, the category {category} does not exist."
@@ -200,7 +216,7 @@ def sum_spending_in_category_and_month(category, month_year_string, print_total)
 def sum_spending_in_category_and_date_range(category, start_date, end_date):
     if category_exist(category, transaction_database):
         total_spending = calculate_spending(transaction_database, category, start_date, end_date, 0)
-        return f"Total Spending of {category} (from {start_date} to {end_date}): {total_spending:.2f}"
+        return f"Total Spending of {category} (from {start_date} to {end_date}): {format_cents(total_spending)}"
     else:
         return f"Sorry, the category {category} does not exist."
 
@@ -223,8 +239,8 @@ def print_total_spending(categories=None):
     output = []
     for category in categories:
         total_spending = calculate_spending(transaction_database, category, "", "", 0)
-        if total_spending > 0.0:
-            output = output + [f"Total Spending of {category}: {total_spending:.2f}"]  
+        if total_spending > 0:
+            output = output + [f"Total Spending of {category}: {format_cents(total_spending)}"]  
     return output
 # Calculate percentage change
 def calculate_percentage_change(old_value, new_value):
@@ -0,0 +1,69 @@
+#imperative code
+# Copy of iter_json_file from functional/json_stream.py. The imperative scripts are run on their own from
+# this directory and share no package with the functional version, so the reader is kept here rather than
+# imported across folders; a fix to one copy belongs in the other.
+import json
+
+# characters read from the file at a time
+CHUNK_SIZE = 1 << 16
+
+WHITESPACE = " \t\n\r"
+
+
+# yield the entries of a JSON file holding a top-level array one at a time, holding at most one entry and
+# one chunk of the file in memory
+def iter_json_file(file_path, chunk_size=CHUNK_SIZE):
+    decoder = json.JSONDecoder()
+    with open(file_path, "r") as file:
+        buffer = file.read(chunk_size)
+        eof = not buffer
+        position = 0
+        started = False
+        expect_entry = True
+        while True:
+            # skip the whitespace, reading more of the file when the buffer runs out
+            while True:
+                while position < len(buffer) and buffer[position] in WHITESPACE:
+                    position += 1
+                if position < len(buffer) or eof:
+                    break
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+
+            if position >= len(buffer):
+                if started:
+                    raise ValueError("Unexpected end of file inside the JSON array.")
+                return
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array at the top level.")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            if not expect_entry:
+                if buffer[position] != ",":
+                    raise ValueError(f"Expected ',' or ']' in the JSON array, found {buffer[position]!r}.")
+                position += 1
+                expect_entry = True
+                continue
+
+            # decode the entry, a number cut by the end of the buffer decodes too early so only accept an
+            # entry followed by a delimiter that is already in the buffer
+            while True:
+                try:
+                    entry, end = decoder.raw_decode(buffer, position)
+                    if eof or (end < len(buffer) and buffer[end] in WHITESPACE + ",]"):
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+
+            position = end
+            expect_entry = False
+            yield entry
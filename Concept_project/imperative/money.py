@@ -0,0 +1,40 @@
+#imperative code
+# Copy of the cent helpers in functional/money.py. The imperative scripts are run on their own from this
+# directory and share no package with the functional version, so the helpers are kept here rather than
+# imported across folders; a fix to one copy belongs in the other.
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+# Amounts are summed as integer cents so totals are exact, and turned back into decimals only for display.
+CENTS_PER_UNIT = 100
+
+
+# integer cents of an amount given as an int, a float or a numeric string, rounded to the nearest cent
+def to_cents(amount):
+    if isinstance(amount, bool):
+        raise ValueError(f"Invalid amount: {amount!r}")
+    if isinstance(amount, int):
+        return amount * CENTS_PER_UNIT
+    if isinstance(amount, float):
+        try:
+            return round(amount * CENTS_PER_UNIT)
+        except (OverflowError, ValueError):
+            raise ValueError(f"Invalid amount: {amount!r}") from None
+    try:
+        value = Decimal(amount.strip() if isinstance(amount, str) else amount)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f"Invalid amount: {amount!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount: {amount!r}")
+    return int((value * CENTS_PER_UNIT).to_integral_value(ROUND_HALF_EVEN))
+
+
+# the amount of a number of cents, as stored in the JSON file
+def cents_to_amount(cents):
+    return cents / CENTS_PER_UNIT
+
+
+# exact decimal text of a number of cents, "3010.00"
+def format_cents(cents):
+    units, rest = divmod(abs(cents), CENTS_PER_UNIT)
+    sign = "-" if cents < 0 else ""
+    return f"{sign}{units}.{rest:02d}"